@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("books", "0002_alter_book_cover_art"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="author",
+            index=models.Index(fields=["-created_at"], name="books_autho_created_134141_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="book",
+            index=models.Index(fields=["-created_at"], name="books_book_created_ea3fe5_idx"),
+        ),
+    ]
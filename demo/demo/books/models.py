@@ -1,10 +1,10 @@
 from django.db import models
 from django.utils.text import slugify
 
-from falco.models import TimeStamped
+from falco.models import IndexedTimeStamped
 
 
-class Book(TimeStamped):
+class Book(IndexedTimeStamped):
     lookup_field = "slug"
 
     name = models.CharField(max_length=255)
@@ -24,7 +24,7 @@ class Book(TimeStamped):
         return super().save(*args, **kwargs)
 
 
-class Author(TimeStamped):
+class Author(IndexedTimeStamped):
     name = models.CharField(max_length=255)
 
     def __str__(self):
@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class FalcoConfig(AppConfig):
+    name = "falco"
+
+    def ready(self):
+        from falco import checks  # noqa: F401
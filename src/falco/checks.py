@@ -0,0 +1,60 @@
+from pathlib import Path
+
+from django.apps import apps
+from django.core.checks import Error
+from django.core.checks import register
+from django.core.checks import Tags
+from django.core.checks import Warning
+from django.urls import get_resolver
+
+from falco.htmx import precompile_partials
+from falco.models import TimeStamped
+
+
+@register(Tags.templates)
+def check_htmx_partials(app_configs, **kwargs) -> list[Error]:
+    try:
+        # importing the url configuration imports the views, which registers their for_htmx declarations
+        get_resolver().url_patterns  # noqa: B018
+    except Exception:  # noqa: BLE001
+        # broken url configurations are reported by django's own checks
+        return []
+
+    return [
+        Error(
+            f"Could not load the template or partial used by for_htmx: {error!r}",
+            obj=f"{declaration.view.__module__}.{declaration.view.__qualname__}",
+            id="falco.E001",
+        )
+        for declaration, error in precompile_partials()
+    ]
+
+
+@register(Tags.models)
+def check_timestamped_indexes(app_configs, **kwargs) -> list[Warning]:
+    if app_configs is None:
+        # the models of installed packages can't be changed by the project
+        app_configs = [config for config in apps.get_app_configs() if not _is_installed_package(config)]
+    models = [model for config in app_configs for model in config.get_models()]
+    return [
+        Warning(
+            "TimeStamped model without an index on created_at, the generated list views order by it.",
+            hint="Inherit from falco.models.IndexedTimeStamped or add falco.models.created_at_index() to Meta.indexes.",
+            obj=model,
+            id="falco.W001",
+        )
+        for model in models
+        if issubclass(model, TimeStamped) and not model._meta.proxy and not _has_created_at_index(model)  # noqa: SLF001
+    ]
+
+
+def _is_installed_package(app_config) -> bool:
+    return not {"site-packages", "dist-packages"}.isdisjoint(Path(app_config.path).parts)
+
+
+def _has_created_at_index(model) -> bool:
+    meta = model._meta  # noqa: SLF001
+    if meta.get_field("created_at").db_index:
+        return True
+    # a btree index is scanned in both directions, so ascending indexes work for the descending ordering too
+    return any(index.fields and index.fields[0].lstrip("-") == "created_at" for index in meta.indexes)
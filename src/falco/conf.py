@@ -1,37 +1,96 @@
 from __future__ import annotations
 
-import sys
 from dataclasses import dataclass
+from dataclasses import field
+from dataclasses import fields
 
 from django.conf import settings
-
-if sys.version_info >= (3, 12):
-    from typing import override
-else:  # pragma: no cover
-    from typing_extensions import override  # pyright: ignore[reportUnreachable]
-
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.dispatch import receiver
 
 FALCO_SETTINGS_NAME = "FALCO"
 
 
 @dataclass(frozen=True)
 class AppSettings:
-    CACHE_TIME_FAVICON = 60 * 60 * 24  # one day
-    CACHE_TIME_ROBOTS_TXT = 60 * 60 * 24  # one day
-    CACHE_TIME_SECURITY_TXT = 60 * 60 * 24  # one day
-    TEMPLATE_ROBOTS_TXT = "robots.txt"
-    TEMPLATE_SECURITY_TXT = ".well-known/security.txt"
-    DEFAULT_PAGE_SIZE = 20
-    SENTRY_DISGARDED_METHODS = ["GET", "HEAD"]
-    SENTRY_DISGARDED_PATHS = ["/health/"]
-    SENTRY_PROFILE_RATE = 0.5
-    SENTRY_TRACES_RATE = 0.5
-    WORK = {}
-
-    @override
-    def __getattribute__(self, __name: str) -> object:
+    ASYNC_VIEWS: bool | None = None  # None for async views in ASGI-only projects, True or False to force it
+    BULK_BATCH_SIZE: int = 1000  # rows per statement for the TimeStampedQuerySet bulk operations
+    CACHE_TIME_COUNT: int = 60 * 5  # five minutes
+    CACHE_TIME_FAVICON: int = 60 * 60 * 24  # one day
+    CACHE_TIME_READINESS: int = 5  # five seconds
+    CACHE_TIME_ROBOTS_TXT: int = 60 * 60 * 24  # one day
+    CACHE_TIME_SECURITY_TXT: int = 60 * 60 * 24  # one day
+    TEMPLATE_ROBOTS_TXT: str = "robots.txt"
+    TEMPLATE_SECURITY_TXT: str = ".well-known/security.txt"
+    DEFAULT_PAGE_SIZE: int = 20
+    DEFAULT_COUNT_STRATEGY: str = "exact"
+    ESTIMATED_COUNT_THRESHOLD: int = 10_000
+    SENTRY_DISGARDED_METHODS: list[str] = field(default_factory=lambda: ["GET", "HEAD"])
+    SENTRY_DISGARDED_PATHS: list[str] = field(default_factory=lambda: ["/health/", "/health/ready/"])
+    SENTRY_PROFILE_RATE: float = 0.5
+    # glob pattern -> {"traces_rate": ..., "profile_rate": ...}, the first matching pattern wins
+    SENTRY_ROUTE_RATES: dict[str, dict[str, float]] = field(default_factory=dict)
+    SENTRY_TRACES_RATE: float = 0.5
+    SENTRY_TRACES_TARGET: float | None = None  # traces per second and process, None to disable the adaptive rate
+    SENTRY_TRACES_WINDOW: int = 10  # seconds over which the request rate is measured for sentry_traces_target
+    WORK: dict[str, str] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        rates = {f"'{name.lower()}'": getattr(self, name) for name in ("SENTRY_PROFILE_RATE", "SENTRY_TRACES_RATE")}
+        for pattern, route_rates in self.SENTRY_ROUTE_RATES.items():
+            for key, rate in route_rates.items():
+                if key not in ("profile_rate", "traces_rate"):
+                    msg = f"Unknown key '{key}' in {FALCO_SETTINGS_NAME}['sentry_route_rates']['{pattern}']."
+                    raise ImproperlyConfigured(msg)
+                rates[f"'sentry_route_rates']['{pattern}']['{key}'"] = rate
+        for name, rate in rates.items():
+            if not 0 <= rate <= 1:
+                msg = f"{FALCO_SETTINGS_NAME}[{name}] must be between 0 and 1."
+                raise ImproperlyConfigured(msg)
+        if self.SENTRY_TRACES_TARGET is not None and self.SENTRY_TRACES_TARGET <= 0:
+            msg = f"{FALCO_SETTINGS_NAME}['sentry_traces_target'] must be positive."
+            raise ImproperlyConfigured(msg)
+        if self.SENTRY_TRACES_WINDOW < 1:
+            msg = f"{FALCO_SETTINGS_NAME}['sentry_traces_window'] must be at least one second."
+            raise ImproperlyConfigured(msg)
+
+    @classmethod
+    def from_settings(cls) -> AppSettings:
+        """
+        Build the settings from the `FALCO` dict of the django settings, keys are the lowercase attribute names.
+        """
         user_settings = getattr(settings, FALCO_SETTINGS_NAME, {})
-        return user_settings.get(__name.lower(), super().__getattribute__(__name))  # pyright: ignore[reportAny]
+        names = {f.name.lower(): f.name for f in fields(cls)}
+        if unknown := sorted(set(user_settings) - set(names)):
+            msg = f"Unknown {FALCO_SETTINGS_NAME} settings: {', '.join(unknown)}."
+            raise ImproperlyConfigured(msg)
+        return cls(**{names[key]: value for key, value in user_settings.items()})
+
+
+class LazyAppSettings:
+    """
+    Resolve `AppSettings` on first access and copy the values on the instance, so later reads are plain
+    attribute lookups. The snapshot is dropped whenever the `FALCO` setting changes (e.g. `override_settings`).
+    """
+
+    def __getattr__(self, name: str) -> object:
+        snapshot = AppSettings.from_settings()
+        self.__dict__.update({f.name: getattr(snapshot, f.name) for f in fields(snapshot)})
+        try:
+            return self.__dict__[name]
+        except KeyError:
+            msg = f"'{type(self).__name__}' object has no attribute '{name}'"
+            raise AttributeError(msg) from None
+
+    def reload(self) -> None:
+        self.__dict__.clear()
+
+
+app_settings = LazyAppSettings()
 
 
-app_settings = AppSettings()
+@receiver(setting_changed)
+def reload_app_settings(*, setting: str, **kwargs) -> None:
+    if setting == FALCO_SETTINGS_NAME:
+        app_settings.reload()
@@ -1,9 +1,40 @@
+import datetime
+import hashlib
+import re
+import uuid
+from collections.abc import Callable
+from collections.abc import Sequence
+from decimal import Decimal
 from functools import wraps
+from typing import NamedTuple
 
+from asgiref.sync import iscoroutinefunction
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db.models import Model
 from django.http import HttpResponse
+from django.template import TemplateDoesNotExist
+from django.template.context import make_context
+from django.template.loader import get_template
 from django.template.loader import render_to_string
+from django.template.response import TemplateResponse
+from django.utils.cache import get_conditional_response
+from django.utils.cache import patch_vary_headers
+from django.utils.http import quote_etag
 from falco.types import HttpRequest
 
+_FIRST_TAG = re.compile(r"^(\s*<[a-zA-Z][\w:-]*)")
+
+
+class HtmxDeclaration(NamedTuple):
+    view: Callable
+    template_name: str | None
+    use_template: str | None
+    use_partial: str | list[str] | None
+
+
+htmx_declarations: list[HtmxDeclaration] = []
+
 
 def for_htmx(
     *,
@@ -11,6 +42,11 @@ def for_htmx(
     use_template: str | None = None,
     use_partial: str | list[str] | None = None,
     use_partial_from_params: bool = False,
+    swap_oob: bool = False,
+    cache_timeout: int | None = None,
+    cache_vary_on: Sequence[str] = (),
+    cache_per_user: bool = False,
+    template_name: str | None = None,
 ):
     """
     Adapted from https://github.com/spookylukey/django-htmx-patterns/blob/master/code/htmx_patterns/utils.py
@@ -22,76 +58,238 @@ def for_htmx(
     If the optional `if_hx_target` parameter is supplied, the
     hx-target header must match the supplied value as well in order
     for this decorator to be applied.
+
+    All the partials are rendered from a single template lookup and context. With `swap_oob=True`,
+    every partial after the first one gets an `hx-swap-oob="true"` attribute on its root element,
+    so htmx swaps them in place of the elements with the same id.
+
+    Pass `cache_timeout` (in seconds) to cache the rendered content of GET and HEAD requests, other
+    methods are always rendered. The cache key is made of the template, the partials, the full path
+    and the hx-target header, plus the context values named in `cache_vary_on` and the user primary
+    key if `cache_per_user=True`. Those values must be primitives (str, numbers, dates, uuids, None),
+    model instances, or lists and tuples of them, anything else raises a `TypeError`. The view still runs, but its lazy querysets are never
+    evaluated on a cache hit. Cached responses carry an `ETag` and a `Vary: HX-Request, HX-Target`
+    header (plus `Cookie` with `cache_per_user=True`), and a matching `If-None-Match` gets a 304.
+    Partials containing a `{% csrf_token %}` hold a per user token, they can't be cached across users.
+
+    `template_name` is the template the view responds with, when given, the `use_partial` partials
+    are resolved and compiled at startup by the `falco.E001` system check (see `precompile_partials`).
     """
     if len([p for p in [use_partial, use_template, use_partial_from_params] if p]) != 1:
         msg = "You must pass exactly one of 'use_template', 'use_partial' or 'use_partial_from_params=True'"
         raise ValueError(msg)
 
-    def decorator(view):
-        @wraps(view)
-        def _view(request: HttpRequest, *args, **kwargs):
-            resp = view(request, *args, **kwargs)
+    def applies_to(request: HttpRequest) -> bool:
+        return bool(request.htmx) and (if_hx_target is None or request.headers.get("Hx-Target", None) == if_hx_target)
 
-            if not request.htmx:
+    def process_response(request: HttpRequest, resp):
+        partials_to_use = use_partial
+        # the cache key doesn't cover the request body, only safe methods are cached
+        cached = cache_timeout is not None and request.method in ("GET", "HEAD")
+        if not hasattr(resp, "render"):
+            if not resp.content and any(
+                h in resp.headers
+                for h in (
+                    "Hx-Trigger",
+                    "Hx-Trigger-After-Swap",
+                    "Hx-Trigger-After-Settle",
+                    "Hx-Redirect",
+                )
+            ):
+                # This is a special case response, it doesn't need modifying:
                 return resp
 
-            apply_decorator = if_hx_target is None or request.headers.get("Hx-Target", None) == if_hx_target
-            if not apply_decorator:
+            msg = "Cannot modify a response that isn't a TemplateResponse"
+            raise ValueError(msg)
+        if resp.is_rendered:
+            msg = "Cannot modify a response that has already been rendered"
+            raise ValueError(msg)
+
+        if use_partial_from_params:
+            use_partial_from_params_val = _get_param_from_request(request, "use_partial")
+            if use_partial_from_params_val is not None:
+                partials_to_use = use_partial_from_params_val
+
+        if use_template is not None:
+            resp.template_name = use_template
+            if not cached:
                 return resp
 
-            partials_to_use = use_partial
-            if not hasattr(resp, "render"):
-                if not resp.content and any(
-                    h in resp.headers
-                    for h in (
-                        "Hx-Trigger",
-                        "Hx-Trigger-After-Swap",
-                        "Hx-Trigger-After-Settle",
-                        "Hx-Redirect",
-                    )
-                ):
-                    # This is a special case response, it doesn't need modifying:
-                    return resp
+            def render() -> str:
+                return resp.rendered_content
+
+        elif partials_to_use is not None:
+            if not isinstance(partials_to_use, list):
+                partials_to_use = [partials_to_use]
+
+            def render() -> str:
+                rendered_partials = _render_partials(resp, request, partials_to_use)
+                if swap_oob:
+                    rendered_partials[1:] = [
+                        _FIRST_TAG.sub(r'\1 hx-swap-oob="true"', p, count=1) for p in rendered_partials[1:]
+                    ]
+                return "".join(rendered_partials)
 
-                msg = "Cannot modify a response that isn't a TemplateResponse"
-                raise ValueError(msg)
-            if resp.is_rendered:
-                msg = "Cannot modify a response that has already been rendered"
-                raise ValueError(msg)
-
-            if use_partial_from_params:
-                use_partial_from_params_val = _get_param_from_request(request, "use_partial")
-                if use_partial_from_params_val is not None:
-                    partials_to_use = use_partial_from_params_val
-
-            if use_template is not None:
-                resp.template_name = use_template
-            elif partials_to_use is not None:
-                if not isinstance(partials_to_use, list):
-                    partials_to_use = [partials_to_use]
-
-                rendered_partials = [
-                    render_to_string(
-                        f"{resp.template_name}#{b}",
-                        context=resp.context_data,
-                        request=request,
-                    )
-                    for b in partials_to_use
-                ]
+            if not cached:
                 # Create new simple HttpResponse as replacement
-                resp = HttpResponse(
-                    content="".join(rendered_partials),
+                return HttpResponse(
+                    content=render(),
                     status=resp.status_code,
                     headers=resp.headers,
                 )
-
+        else:
             return resp
 
+        key = _cache_key(request, resp, [partials_to_use, swap_oob], cache_vary_on, per_user=cache_per_user)
+        return _cached_response(request, resp, render, key, cache_timeout, per_user=cache_per_user)
+
+    def decorator(view):
+        htmx_declarations.append(HtmxDeclaration(view, template_name, use_template, use_partial))
+
+        if iscoroutinefunction(view):
+
+            @wraps(view)
+            async def _aview(request: HttpRequest, *args, **kwargs):
+                resp = await view(request, *args, **kwargs)
+                if not applies_to(request):
+                    return resp
+                # rendering may evaluate lazy querysets, keep it off the event loop
+                return await sync_to_async(process_response)(request, resp)
+
+            return _aview
+
+        @wraps(view)
+        def _view(request: HttpRequest, *args, **kwargs):
+            resp = view(request, *args, **kwargs)
+            if not applies_to(request):
+                return resp
+            return process_response(request, resp)
+
         return _view
 
     return decorator
 
 
+def precompile_partials() -> list[tuple[HtmxDeclaration, Exception]]:
+    """
+    Load every template and partial referenced by a `for_htmx` declaration, which warms the
+    cached template loader. Returns the declarations that could not be resolved with their error.
+
+    Only the views imported so far are known, import the url configuration first.
+    """
+    errors = []
+    for declaration in htmx_declarations:
+        try:
+            if declaration.use_template:
+                get_template(declaration.use_template)
+            if declaration.template_name and declaration.use_partial:
+                template = get_template(declaration.template_name)
+                partial_contents = _get_partial_contents(getattr(template, "template", None))
+                partials = declaration.use_partial
+                for name in partials if isinstance(partials, list) else [partials]:
+                    if partial_contents is None:
+                        get_template(f"{declaration.template_name}#{name}")
+                    elif name not in partial_contents:
+                        raise TemplateDoesNotExist(name, tried=[declaration.template_name])
+        except Exception as e:  # noqa: BLE001
+            errors.append((declaration, e))
+    return errors
+
+
+def _cached_response(
+    request: HttpRequest,
+    resp: TemplateResponse,
+    render: Callable[[], str],
+    key: str,
+    timeout: int,
+    *,
+    per_user: bool,
+) -> HttpResponse:
+    cached = cache.get(key)
+    if cached is None:
+        content = render()
+        cached = (content, quote_etag(hashlib.md5(content.encode(), usedforsecurity=False).hexdigest()))
+        if resp.status_code == 200:
+            cache.set(key, cached, timeout)
+    content, etag = cached
+
+    response = HttpResponse(content=content, status=resp.status_code, headers=resp.headers)
+    response["ETag"] = etag
+    # per user content is identified by the session cookie, shared caches must not serve it to other users
+    patch_vary_headers(response, ("HX-Request", "HX-Target", "Cookie") if per_user else ("HX-Request", "HX-Target"))
+    return get_conditional_response(request, etag=etag, response=response)
+
+
+def _cache_key(
+    request: HttpRequest, resp: TemplateResponse, options: list, vary_on: Sequence[str], *, per_user: bool
+) -> str:
+    context = resp.context_data or {}
+    parts = [
+        repr(resp.template_name),
+        repr(options),
+        request.get_full_path(),
+        request.headers.get("HX-Target", ""),
+        *(_cache_key_part(name, context.get(name)) for name in vary_on),
+    ]
+    if per_user:
+        parts.append(str(getattr(getattr(request, "user", None), "pk", None)))
+    return f"falco.htmx.{hashlib.md5(chr(0).join(parts).encode(), usedforsecurity=False).hexdigest()}"
+
+
+# values whose repr is stable across requests and doesn't touch the database
+_CACHE_KEY_TYPES = (str, bytes, int, float, Decimal, datetime.date, datetime.time, uuid.UUID, type(None))
+
+
+def _cache_key_part(name: str, value) -> str:
+    if isinstance(value, Model):
+        return f"{value._meta.label}:{value.pk}"  # noqa
+    if isinstance(value, (list, tuple)):
+        return repr([_cache_key_part(name, item) for item in value])
+    if isinstance(value, _CACHE_KEY_TYPES):
+        return repr(value)
+    # a queryset repr runs a query, the repr of most objects holds their address
+    msg = f"Can't vary the cache on '{name}' ({type(value).__name__}), use primitives or model instances."
+    raise TypeError(msg)
+
+
+def _render_partials(resp: TemplateResponse, request: HttpRequest, partials: list[str]) -> list[str]:
+    """
+    Render the partials with a single template lookup and a single context, context
+    processors run once no matter how many partials are requested.
+    """
+    template = resp.resolve_template(resp.template_name)
+    partial_contents = _get_partial_contents(getattr(template, "template", None))
+    if partial_contents is None:
+        # not a django template, let the template loader find each partial
+        return [
+            render_to_string(f"{resp.template_name}#{p}", context=resp.context_data, request=request) for p in partials
+        ]
+
+    context = make_context(
+        resp.resolve_context(resp.context_data), request, autoescape=template.backend.engine.autoescape
+    )
+    rendered = []
+    with context.bind_template(template.template):
+        for name in partials:
+            try:
+                partial = partial_contents[name]
+            except KeyError as e:
+                raise TemplateDoesNotExist(name, tried=[template.origin.template_name]) from e
+            rendered.append(partial.render(context))
+    return rendered
+
+
+def _get_partial_contents(template) -> dict | None:
+    # partials are stored on `extra_data` from Django 5.1, on the template origin before that
+    if template is None:
+        return None
+    extra_data = getattr(template, "extra_data", None)
+    if extra_data is not None:
+        return extra_data.get("partials", {})
+    origin = getattr(template, "origin", None)
+    return getattr(origin, "partial_contents", {}) if origin is not None else None
+
+
 def _get_param_from_request(request, param):
     """
     Checks GET then POST params for specified param
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+import functools
+from importlib.util import find_spec
+
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.safestring import SafeString
+
+if find_spec("heroicons"):
+    from heroicons.templatetags import heroicons
+
+
+def render_icon(style: str, name: str, size: int | str | None = 24, **attrs: object) -> SafeString:
+    """
+    Render a heroicon svg (`style` is one of micro, mini, outline or solid), each style, name, size
+    and attributes combination is only rendered once per process.
+    """
+    return _render_icon(style, name, size, tuple(attrs.items()))
+
+
+@functools.lru_cache(maxsize=256)
+def _render_icon(style: str, name: str, size: int | str | None, attrs: tuple[tuple[str, object], ...]) -> SafeString:
+    if not find_spec("heroicons"):
+        msg = "Icons require the heroicons package, install it with `pip install heroicons[django]`."
+        raise ImproperlyConfigured(msg)
+    return getattr(heroicons, f"heroicon_{style}")(name, size=size, **dict(attrs))
@@ -45,9 +45,9 @@ class Command(BaseCommand):
             models_file.write_text(
                 f"""
 from django.db import models
-from falco.models import TimeStamped
+from falco.models import IndexedTimeStamped
 
-class {model_name}(TimeStamped):
+class {model_name}(IndexedTimeStamped):
     name=models.CharField(max_length=255)
 
     def __str__(self):
@@ -1,6 +1,102 @@
 from __future__ import annotations
 
+import datetime
+import uuid
+from collections.abc import Iterable
+from collections.abc import Sequence
+from decimal import Decimal
+
+import django
 from django.db import models
+from django.db.models.fields.files import FieldFile
+from django.db.models.functions import Now
+from django.utils import timezone
+from falco.conf import app_settings
+
+
+class TimeStampedQuerySet(models.QuerySet):
+    """
+    Bulk writes that keep `updated_at` current, in the same statements as the rest of the data.
+
+    Bulk operations are batched by the `bulk_batch_size` setting when no `batch_size` is given.
+    """
+
+    def update(self, **kwargs) -> int:
+        kwargs.setdefault("updated_at", Now())
+        return super().update(**kwargs)
+
+    def bulk_update(self, objs: Iterable[models.Model], fields: Sequence[str], batch_size: int | None = None) -> int:
+        objs = list(objs)
+        now = timezone.now()
+        for obj in objs:
+            obj.updated_at = now
+        batch_size = batch_size or app_settings.BULK_BATCH_SIZE
+        return super().bulk_update(objs, _with_updated_at(fields), batch_size=batch_size)
+
+    def bulk_create(
+        self,
+        objs: Iterable[models.Model],
+        batch_size: int | None = None,
+        ignore_conflicts: bool = False,
+        update_conflicts: bool = False,
+        update_fields: Sequence[str] | None = None,
+        unique_fields: Sequence[str] | None = None,
+    ) -> list[models.Model]:
+        # new rows get their timestamps from the fields pre_save, conflicting rows need updated_at in update_fields
+        if update_conflicts and update_fields:
+            update_fields = _with_updated_at(update_fields)
+        return super().bulk_create(
+            objs,
+            batch_size=batch_size or app_settings.BULK_BATCH_SIZE,
+            ignore_conflicts=ignore_conflicts,
+            update_conflicts=update_conflicts,
+            update_fields=update_fields,
+            unique_fields=unique_fields,
+        )
+
+    def upsert(
+        self,
+        objs: Iterable[models.Model],
+        unique_fields: Sequence[str],
+        update_fields: Sequence[str],
+        batch_size: int | None = None,
+    ) -> list[models.Model]:
+        """
+        Insert `objs`, or update `update_fields` (and `updated_at`) of the rows conflicting on `unique_fields`.
+        """
+        return self.bulk_create(
+            objs,
+            batch_size=batch_size,
+            update_conflicts=True,
+            update_fields=update_fields,
+            unique_fields=unique_fields,
+        )
+
+
+# values the change tracking of TimeStamped can compare, they only change by assignment (file names
+# are compared, a FieldFile equals its name)
+_IMMUTABLE_TYPES = (
+    str,
+    bytes,
+    int,
+    float,
+    Decimal,
+    datetime.date,
+    datetime.time,
+    datetime.timedelta,
+    uuid.UUID,
+    FieldFile,
+    type(None),
+)
+
+
+def _snapshot(value: object) -> object:
+    # a FieldFile is updated in place by FieldFile.save, keep its name
+    return value.name if isinstance(value, FieldFile) else value
+
+
+def _with_updated_at(fields: Sequence[str]) -> list[str]:
+    return [*fields, "updated_at"] if "updated_at" not in fields else list(fields)
 
 
 class TimeStamped(models.Model):
@@ -44,9 +140,46 @@ class TimeStamped(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, editable=False)
     updated_at = models.DateTimeField(auto_now=True, editable=False)
 
+    # When enabled, `save()` on a loaded instance only writes the fields that changed since it was loaded
+    # (or last saved) and skips the query, and the model signals, when nothing changed.
+    track_changes = False
+
+    objects = TimeStampedQuerySet.as_manager()
+
     class Meta:
         abstract = True
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if cls.track_changes:
+            # references to the loaded values, nothing is copied, see get_changed_fields
+            instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def get_changed_fields(self) -> set[str]:
+        """
+        Names of the fields changed since the instance was loaded, when `track_changes` is enabled.
+
+        Mutable values (e.g. the dicts and lists of a `JSONField`) could be modified in place,
+        they are always reported as changed.
+        """
+        loaded_values = self.__dict__.get("_loaded_values")
+        if loaded_values is None:
+            return {field.name for field in self._meta.concrete_fields}
+        changed = set()
+        for field in self._meta.concrete_fields:
+            if field.attname not in self.__dict__:  # deferred and never loaded
+                continue
+            value = self.__dict__[field.attname]
+            if (
+                field.attname not in loaded_values
+                or not isinstance(value, _IMMUTABLE_TYPES)
+                or value != loaded_values[field.attname]
+            ):
+                changed.add(field.name)
+        return changed
+
     def save(self, *args, **kwargs) -> None:
         """
         Overriding the save method in order to make sure that
@@ -54,10 +187,98 @@ class TimeStamped(models.Model):
         a parameter to the update field argument.
         """
         update_fields = kwargs.get("update_fields", None)
+        if update_fields is None and not args and self._can_narrow_update(kwargs):
+            update_fields = self.get_changed_fields() - {"updated_at"}
+            if not update_fields:
+                return
+            if self._meta.pk.name in update_fields:
+                update_fields = None
         if update_fields:
             kwargs["update_fields"] = set(update_fields).union({"updated_at"})
 
         super().save(*args, **kwargs)
 
+        if self.track_changes:
+            # fields left out of update_fields still differ from the database
+            self._update_loaded_values(kwargs.get("update_fields"))
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs) -> None:
+        super().refresh_from_db(using, fields, **kwargs)
+        if self.track_changes:
+            self._update_loaded_values(fields)
+
+    def _update_loaded_values(self, names: Iterable[str] | None) -> None:
+        # snapshot the `names` fields (all of them when None) as the values stored in the database
+        fields = self._meta.concrete_fields
+        if names is None:
+            self._loaded_values = {}
+        elif "_loaded_values" not in self.__dict__:
+            return
+        else:
+            names = set(names)
+            fields = [field for field in fields if field.name in names or field.attname in names]
+        for field in fields:
+            if field.attname in self.__dict__:
+                self._loaded_values[field.attname] = _snapshot(self.__dict__[field.attname])
+
+    def _can_narrow_update(self, save_kwargs: dict) -> bool:
+        return (
+            self.track_changes
+            and "_loaded_values" in self.__dict__
+            and not self._state.adding
+            and not save_kwargs.get("force_insert")
+            and save_kwargs.get("using", self._state.db) == self._state.db
+        )
+
     def is_edited(self) -> bool:
         return self.created_at != self.updated_at
+
+
+def created_at_index() -> models.Index:
+    """
+    Descending index on `created_at`, the ordering of the generated list views. Add it to the `Meta.indexes`
+    of a `TimeStamped` model, or inherit from `IndexedTimeStamped`. For the keyset pagination on
+    `("-created_at", "-pk")`, declare `models.Index(fields=["-created_at", "-id"], name=...)` instead.
+    """
+    return models.Index(fields=["-created_at"])
+
+
+class IndexedTimeStamped(TimeStamped):
+    """
+    `TimeStamped` with `created_at_index`, so list pages don't sort the whole table.
+
+    A subclass declaring its own `Meta` must extend `IndexedTimeStamped.Meta` to keep the index.
+    """
+
+    class Meta:
+        abstract = True
+        indexes = [created_at_index()]
+
+
+if django.VERSION >= (5, 0):
+    from django.db.models.expressions import DatabaseDefault
+
+    class DBTimeStamped(TimeStamped):
+        """
+        `TimeStamped` whose timestamps are set by the database on insert (`db_default=Now()`), including for rows
+        inserted outside of django. `updated_at` is still set by `save` and the `TimeStampedQuerySet` methods on
+        updates. On backends that can't return columns from an insert, `save` reads the timestamps back with an
+        extra query.
+        """
+
+        created_at = models.DateTimeField(db_default=Now(), editable=False)
+        updated_at = models.DateTimeField(db_default=Now(), editable=False)
+
+        class Meta:
+            abstract = True
+
+        def save(self, *args, **kwargs) -> None:
+            if not self._state.adding:
+                self.updated_at = timezone.now()
+            super().save(*args, **kwargs)
+            # backends that can't return columns from an insert leave the database defaults unresolved, they would
+            # be written back as DEFAULT (resetting created_at) by the next update
+            if unresolved := [
+                name for name in ("created_at", "updated_at") if isinstance(self.__dict__.get(name), DatabaseDefault)
+            ]:
+                self.refresh_from_db(fields=unresolved)
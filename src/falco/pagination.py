@@ -1,26 +1,512 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import hashlib
+import json
+from collections.abc import Sequence
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.core.exceptions import FieldDoesNotExist
+from django.core.exceptions import ValidationError
+from django.core.paginator import EmptyPage
 from django.core.paginator import InvalidPage
+from django.core.paginator import Page
+from django.core.paginator import PageNotAnInteger
 from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Count
+from django.db.models import Field
+from django.db.models import Model
+from django.db.models import Q
 from django.db.models import QuerySet
+from django.db.models import Window
+from django.db.models.query import ModelIterable
 from django.http import Http404
+from django.utils.functional import cached_property
 
 from falco.conf import app_settings
 from falco.types import HttpRequest
 
+DEFAULT_CURSOR_ORDERING = ("-created_at", "-pk")
+LAST_CURSOR = "last"
+
+
+def paginate_queryset(
+    request: HttpRequest,
+    queryset: QuerySet,
+    page_size: int | None = None,
+    count_strategy: str | None = None,
+    fields: Sequence[str] | None = None,
+):
+    """
+    Paginate `queryset` using the `page` GET parameter, `?page=last` returns the last page (a 404 with the
+    countless strategy, which never counts).
+
+    `count_strategy` controls how the total number of objects is computed, see `COUNT_STRATEGIES`.
+    `page_size` and `count_strategy` default to the `default_page_size` and `default_count_strategy` settings.
+
+    When `fields` is given (usually the fields displayed in the table), only those columns and the
+    model `lookup_field` are loaded, see `project_queryset`.
+    """
+    paginator = _get_paginator(queryset, page_size, count_strategy, fields)
+    page_number = _get_page_number(request)
+    if page_number == "last":
+        _check_last_page(paginator)
+        page_number = paginator.num_pages
+
+    try:
+        return paginator.page(page_number)
+    except InvalidPage as exc:
+        msg = "Invalid page (%s): %s"
+        raise Http404(msg % (page_number, str(exc))) from exc
+
+
+async def apaginate_queryset(
+    request: HttpRequest,
+    queryset: QuerySet,
+    page_size: int | None = None,
+    count_strategy: str | None = None,
+    fields: Sequence[str] | None = None,
+):
+    """
+    Async version of `paginate_queryset`, the count and the page rows are fetched with the async ORM.
 
-def paginate_queryset(request: HttpRequest, queryset: QuerySet, page_size: int = app_settings.DEFAULT_PAGE_SIZE):
-    paginator = Paginator(queryset, page_size)
+    The returned page holds the evaluated rows, so it can be rendered without touching the database again.
+    """
+    paginator = _get_paginator(queryset, page_size, count_strategy, fields)
+    page_number = _get_page_number(request)
+    if page_number == "last":
+        _check_last_page(paginator)
+        await paginator.acount()
+        page_number = paginator.num_pages
+
+    try:
+        return await paginator.apage(page_number)
+    except InvalidPage as exc:
+        msg = "Invalid page (%s): %s"
+        raise Http404(msg % (page_number, str(exc))) from exc
+
+
+def _check_last_page(paginator: ExactCountPaginator) -> None:
+    # finding the last page needs the count the countless strategy exists to avoid
+    if isinstance(paginator, CountlessPaginator):
+        msg = "Invalid page (last): the last page is unknown without counting the objects"
+        raise Http404(msg)
+
+
+def _get_paginator(
+    queryset: QuerySet, page_size: int | None, count_strategy: str | None, fields: Sequence[str] | None
+) -> ExactCountPaginator:
+    if fields:
+        queryset = project_queryset(queryset, fields)
+    strategy = count_strategy or app_settings.DEFAULT_COUNT_STRATEGY
+    try:
+        paginator_class = COUNT_STRATEGIES[strategy]
+    except KeyError as e:
+        msg = f"Unknown count strategy '{strategy}', expected one of {', '.join(COUNT_STRATEGIES)}."
+        raise ValueError(msg) from e
+    return paginator_class(queryset, page_size or app_settings.DEFAULT_PAGE_SIZE)
+
+
+def _get_page_number(request: HttpRequest) -> int | str:
     page_number = request.GET.get("page") or 1
     try:
-        page_number = int(page_number)
+        return int(page_number)
     except ValueError as e:
         if page_number == "last":
-            page_number = paginator.num_pages
+            return page_number
+        msg = "Page is not 'last', nor can it be converted to an int."
+        raise Http404(msg) from e
+
+
+def project_queryset(queryset: QuerySet, fields: Sequence[str]) -> QuerySet:
+    """
+    Load only `fields` and the model `lookup_field`, forward relations are fetched with `select_related`.
+
+    The queryset is returned untouched if one of the names is not a concrete field (a property
+    could read any column) or if it already defers some fields.
+    """
+    if queryset._iterable_class is not ModelIterable or queryset.query.deferred_loading[0]:  # noqa
+        return queryset
+
+    model = queryset.model
+    names = {*fields, getattr(model, "lookup_field", "pk")} - {"pk"}
+    related = []
+    for name in names:
+        try:
+            field = model._meta.get_field(name)  # noqa
+        except FieldDoesNotExist:
+            return queryset
+        if not field.concrete or field.many_to_many:
+            return queryset
+        if field.is_relation:
+            related.append(name)
+
+    queryset = queryset.only(*names)
+    return queryset.select_related(*related) if related else queryset
+
+
+class ExactCountPaginator(Paginator):
+    """
+    Django's `Paginator` with `acount` and `apage` for async views.
+    """
+
+    async def acount(self) -> int:
+        if "count" not in self.__dict__:
+            self.count = await _acount(self.object_list)
+        return self.count
+
+    async def apage(self, number) -> Page:
+        await self.acount()
+        page = self.page(number)
+        if isinstance(page.object_list, QuerySet):
+            page.object_list = [obj async for obj in page.object_list]
+        return page
+
+
+class CachedCountPaginator(ExactCountPaginator):
+    """
+    Exact count, cached per queryset SQL for `cache_time_count` seconds.
+    """
+
+    @cached_property
+    def count(self) -> int:
+        key = _count_cache_key(self.object_list)
+        if key is None:
+            return super().count
+        count = cache.get(key)
+        if count is None:
+            count = super().count
+            cache.set(key, count, app_settings.CACHE_TIME_COUNT)
+        return count
+
+    async def acount(self) -> int:
+        if "count" in self.__dict__:
+            return self.count
+        key = _count_cache_key(self.object_list)
+        count = await cache.aget(key) if key else None
+        if count is None:
+            count = await _acount(self.object_list)
+            if key:
+                await cache.aset(key, count, app_settings.CACHE_TIME_COUNT)
+        self.count = count
+        return count
+
+
+class WindowCountPaginator(ExactCountPaginator):
+    """
+    Exact count fetched along with the page rows with a `COUNT(*) OVER ()` window, in a single query.
+    """
+
+    count_annotation = "_falco_total_count"
+
+    def page(self, number):
+        if not _supports_window_count(self.object_list):
+            return super().page(number)
+        number = _validate_page_number(self, number)
+        return self._page_from_rows(list(self._window_queryset(number)), number)
+
+    async def apage(self, number):
+        if not _supports_window_count(self.object_list):
+            return await super().apage(number)
+        number = _validate_page_number(self, number)
+        return self._page_from_rows([obj async for obj in self._window_queryset(number)], number)
+
+    def _window_queryset(self, number: int) -> QuerySet:
+        bottom = (number - 1) * self.per_page
+        queryset = self.object_list.annotate(**{self.count_annotation: Window(Count("*"))})
+        return queryset[bottom : bottom + self.per_page]
+
+    def _page_from_rows(self, rows: list, number: int) -> Page:
+        if rows:
+            self.count = getattr(rows[0], self.count_annotation)
+        elif number > 1 or not self.allow_empty_first_page:
+            # past the end, there is no row to read the count from
+            raise EmptyPage(self.error_messages["no_results"])
         else:
-            msg = "Page is not 'last', nor can it be converted to an int."
-            raise Http404(msg) from e
+            self.count = 0
+        return self._get_page(rows, number, self)
+
+
+class EstimatedCountPaginator(ExactCountPaginator):
+    """
+    Use the query planner row estimate as the count on PostgreSQL.
+
+    Estimates below `estimated_count_threshold` and other databases fall back to an exact count,
+    check `count_is_approximate` to know which one was used.
+    """
+
+    @cached_property
+    def count(self) -> int:
+        if self.count_is_approximate:
+            return self._estimate
+        return super().count
+
+    @property
+    def count_is_approximate(self) -> bool:
+        return self._estimate is not None and self._estimate >= app_settings.ESTIMATED_COUNT_THRESHOLD
+
+    @cached_property
+    def _estimate(self) -> int | None:
+        return _estimate_count(self.object_list)
+
+    async def acount(self) -> int:
+        if "_estimate" not in self.__dict__:
+            # EXPLAIN goes through a raw cursor, which has no async API
+            self._estimate = await sync_to_async(_estimate_count)(self.object_list)
+        if self.count_is_approximate:
+            self.count = self._estimate
+        return await super().acount()
+
 
+class CountlessPaginator(ExactCountPaginator):
+    """
+    Never count, one extra row is fetched to know if there is a next page.
+
+    Meant for "load more" and infinite scroll lists, render it with `partials/infinite_scroll.html`,
+    the numbered `partials/pagination.html` would need the count again.
+    """
+
+    def page(self, number):
+        number = _validate_page_number(self, number)
+        return self._page_from_rows(list(self._lookahead_queryset(number)), number)
+
+    async def apage(self, number):
+        number = _validate_page_number(self, number)
+        return self._page_from_rows([obj async for obj in self._lookahead_queryset(number)], number)
+
+    def _lookahead_queryset(self, number: int):
+        bottom = (number - 1) * self.per_page
+        return self.object_list[bottom : bottom + self.per_page + 1]
+
+    def _page_from_rows(self, rows: list, number: int) -> Page:
+        if not rows and (number > 1 or not self.allow_empty_first_page):
+            raise EmptyPage(self.error_messages["no_results"])
+        return CountlessPage(rows[: self.per_page], number, self, has_next=len(rows) > self.per_page)
+
+
+class CountlessPage(Page):
+    def __init__(self, object_list, number, paginator, *, has_next: bool):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def __repr__(self):
+        return f"<Page {self.number}>"
+
+    def has_next(self) -> bool:
+        return self._has_next
+
+    def next_page_number(self) -> int:
+        if not self._has_next:
+            raise EmptyPage(self.paginator.error_messages["no_results"])
+        return self.number + 1
+
+    def previous_page_number(self) -> int:
+        # Page.previous_page_number validates the number against num_pages, which counts
+        if self.number <= 1:
+            raise EmptyPage(self.paginator.error_messages["min_page"])
+        return self.number - 1
+
+    def start_index(self) -> int:
+        if not self.object_list:
+            return 0
+        return (self.paginator.per_page * (self.number - 1)) + 1
+
+    def end_index(self) -> int:
+        return self.start_index() + len(self.object_list) - 1 if self.object_list else 0
+
+
+COUNT_STRATEGIES: dict[str, type[ExactCountPaginator]] = {
+    "exact": ExactCountPaginator,
+    "cached": CachedCountPaginator,
+    "window": WindowCountPaginator,
+    "estimated": EstimatedCountPaginator,
+    "countless": CountlessPaginator,
+}
+
+
+async def _acount(object_list) -> int:
+    if isinstance(object_list, QuerySet):
+        return await object_list.acount()
+    return len(object_list)
+
+
+def _validate_page_number(paginator: Paginator, number) -> int:
+    # same as Paginator.validate_number, without the upper bound check that needs the count
     try:
-        return paginator.page(page_number)
-    except InvalidPage as exc:
-        msg = "Invalid page (%s): %s"
-        raise Http404(msg % (page_number, str(exc))) from exc
+        if isinstance(number, float) and not number.is_integer():
+            raise ValueError
+        number = int(number)
+    except (TypeError, ValueError) as e:
+        raise PageNotAnInteger(paginator.error_messages["invalid_page"]) from e
+    if number < 1:
+        raise EmptyPage(paginator.error_messages["min_page"])
+    return number
+
+
+def _count_cache_key(queryset) -> str | None:
+    if not isinstance(queryset, QuerySet):
+        return None
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        return None
+    fingerprint = f"{queryset.db}:{sql}:{params!r}".encode()
+    return f"falco.pagination.count.{hashlib.md5(fingerprint, usedforsecurity=False).hexdigest()}"
+
+
+def _supports_window_count(queryset) -> bool:
+    return (
+        isinstance(queryset, QuerySet)
+        and queryset._iterable_class is ModelIterable  # noqa
+        and not queryset.query.distinct
+        and not queryset.query.is_sliced
+        and not queryset.query.combinator
+    )
+
+
+def _estimate_count(queryset) -> int | None:
+    if not isinstance(queryset, QuerySet) or connections[queryset.db].vendor != "postgresql":
+        return None
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        return None
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def paginate_queryset_by_cursor(
+    request: HttpRequest,
+    queryset: QuerySet,
+    page_size: int | None = None,
+    ordering: Sequence[str] = DEFAULT_CURSOR_ORDERING,
+    fields: Sequence[str] | None = None,
+) -> CursorPage:
+    """
+    Keyset (cursor) pagination, the page is read from the opaque `cursor` GET parameter.
+
+    Instead of an `OFFSET`, each page seeks past the last row of the previous one using
+    the `ordering` key, so deep pages cost the same as the first one and rows inserted
+    while a user is paging don't shift the results. The last element of `ordering` must
+    make the key unique (the primary key is a good choice) and none of the key fields
+    can be null. Use `?cursor=last` to jump to the last page.
+
+    `fields` restricts the loaded columns like in `paginate_queryset`.
+    """
+    page_size = page_size or app_settings.DEFAULT_PAGE_SIZE
+    keyset = _Keyset(queryset.model, ordering)
+    if fields:
+        queryset = project_queryset(queryset, [*fields, *keyset.names])
+    cursor = request.GET.get("cursor") or None
+    if cursor == LAST_CURSOR:
+        rows = list(queryset.order_by(*keyset.reversed_ordering)[: page_size + 1])
+        has_previous, has_next = len(rows) > page_size, False
+        rows = rows[:page_size][::-1]
+    elif cursor is None:
+        rows = list(queryset.order_by(*keyset.ordering)[: page_size + 1])
+        has_previous, has_next = False, len(rows) > page_size
+        rows = rows[:page_size]
+    else:
+        values, backwards = keyset.decode(cursor)
+        if backwards:
+            rows = list(queryset.filter(keyset.before(values)).order_by(*keyset.reversed_ordering)[: page_size + 1])
+            has_previous, has_next = len(rows) > page_size, True
+            rows = rows[:page_size][::-1]
+        else:
+            rows = list(queryset.filter(keyset.after(values)).order_by(*keyset.ordering)[: page_size + 1])
+            has_previous, has_next = True, len(rows) > page_size
+            rows = rows[:page_size]
+
+    return CursorPage(
+        rows,
+        next_cursor=keyset.encode(rows[-1], backwards=False) if has_next and rows else None,
+        previous_cursor=keyset.encode(rows[0], backwards=True) if has_previous and rows else None,
+    )
+
+
+class CursorPage(Sequence):
+    """
+    A page returned by `paginate_queryset_by_cursor`, render it with `partials/cursor_pagination.html`.
+    """
+
+    def __init__(self, object_list: list, next_cursor: str | None, previous_cursor: str | None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f"<CursorPage of {len(self.object_list)} objects>"
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    def has_other_pages(self) -> bool:
+        return self.has_next() or self.has_previous()
+
+
+class _Keyset:
+    def __init__(self, model: type[Model], ordering: Sequence[str]):
+        if not ordering:
+            msg = "Cursor pagination requires a non empty ordering."
+            raise ValueError(msg)
+        self.ordering = tuple(ordering)
+        self.reversed_ordering = tuple(o[1:] if o.startswith("-") else f"-{o}" for o in self.ordering)
+        self.names = [o.lstrip("-") for o in self.ordering]
+        self.descending = [o.startswith("-") for o in self.ordering]
+        self.fields: list[Field] = []
+        for name in self.names:
+            try:
+                field = model._meta.pk if name == "pk" else model._meta.get_field(name)  # noqa
+            except FieldDoesNotExist as e:
+                msg = f"Cursor pagination can only order on fields of {model.__name__}, got '{name}'."
+                raise ValueError(msg) from e
+            self.fields.append(field)
+
+    def after(self, values: list) -> Q:
+        return self._seek(values, backwards=False)
+
+    def before(self, values: list) -> Q:
+        return self._seek(values, backwards=True)
+
+    def _seek(self, values: list, *, backwards: bool) -> Q:
+        # (a, b) > (x, y) is written as a > x OR (a = x AND b > y), with per field direction
+        condition = Q()
+        for i, (name, descending, value) in enumerate(zip(self.names, self.descending, values)):
+            lookup = "lt" if descending != backwards else "gt"
+            term = Q(**{f"{name}__{lookup}": value})
+            for previous_name, previous_value in zip(self.names[:i], values[:i]):
+                term &= Q(**{previous_name: previous_value})
+            condition |= term
+        return condition
+
+    def encode(self, obj: Model, *, backwards: bool) -> str:
+        payload = {"v": [field.value_to_string(obj) for field in self.fields], "b": backwards}
+        raw = json.dumps(payload, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def decode(self, cursor: str) -> tuple[list, bool]:
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            payload = json.loads(raw)
+            values = [field.to_python(value) for field, value in zip(self.fields, payload["v"], strict=True)]
+            return values, bool(payload["b"])
+        except (binascii.Error, ValueError, TypeError, KeyError, ValidationError) as exc:
+            msg = "Invalid cursor (%s)"
+            raise Http404(msg % cursor) from exc
@@ -1,32 +1,139 @@
 from __future__ import annotations
 
+import fnmatch
+import functools
+import re
+import time
+from collections.abc import Callable
 from importlib.util import find_spec
 from typing import TYPE_CHECKING
 
+from django.core.signals import setting_changed
+from django.dispatch import receiver
 from falco.conf import app_settings
+from falco.conf import FALCO_SETTINGS_NAME
+
+
+class ThroughputSampler:
+    """
+    Lower a sample rate so that at most `target` transactions per second are kept.
+
+    The request rate is measured over the last `window` seconds in a ring of per second buckets. Buckets are
+    updated without a lock, a concurrent update can drop a count which is fine for an estimate.
+    """
+
+    def __init__(self, target: float, window: int = 10, clock: Callable[[], float] = time.monotonic) -> None:
+        self.target = target
+        self.window = window
+        self.clock = clock
+        self.started = int(clock())
+        # (second, count) pairs, indexed by second % window
+        self.buckets: list[tuple[int, int]] = [(-1, 0)] * window
+
+    def sample_rate(self, rate: float) -> float:
+        """
+        Record a request and return `rate`, lowered to hold the target throughput.
+        """
+        now = int(self.clock())
+        index = now % self.window
+        second, count = self.buckets[index]
+        self.buckets[index] = (now, count + 1 if second == now else 1)
+
+        requests = sum(count for second, count in self.buckets if second > now - self.window)
+        elapsed = min(self.window, now - self.started + 1)
+        return min(rate, self.target * elapsed / requests)
+
 
 if find_spec("sentry_sdk"):
     if TYPE_CHECKING:
         from sentry_sdk._types import SamplingContext
 
     def sentry_traces_sampler(sampling_context: SamplingContext):
-        if _should_disregard(sampling_context):
+        """
+        Sample rate of a transaction: 0 for the disregarded requests, the route or default rate otherwise.
+
+        With `sentry_traces_target` set, the rate is lowered to hold the target throughput, and the traces sampled
+        by the upstream service are always kept since they are only complete if every service keeps its part.
+        The sampling context only tells whether the parent was sampled, not whether it errored or was slow,
+        so every sampled parent is kept.
+        """
+        request = _get_request(sampling_context)
+        if request is not None and _should_disregard(*request):
             return 0
+        throughput_sampler = _get_throughput_sampler()
+        if throughput_sampler is not None and sampling_context.get("parent_sampled"):
+            return 1
 
-        return app_settings.SENTRY_TRACES_RATE
+        if request is None:
+            rate = app_settings.SENTRY_TRACES_RATE
+        else:
+            rate = _route_rate(request[1], "traces_rate", app_settings.SENTRY_TRACES_RATE)
+
+        if throughput_sampler is None or not rate:
+            return rate
+        return throughput_sampler.sample_rate(rate)
 
     def sentry_profiles_sampler(sampling_context: SamplingContext):
-        if _should_disregard(sampling_context):
+        request = _get_request(sampling_context)
+        if request is None:
+            return app_settings.SENTRY_PROFILE_RATE
+        if _should_disregard(*request):
             return 0
 
-        return app_settings.SENTRY_PROFILE_RATE
+        return _route_rate(request[1], "profile_rate", app_settings.SENTRY_PROFILE_RATE)
+
+    def _get_request(sampling_context: SamplingContext) -> tuple[str, str] | None:
+        """
+        Return the method and path of the request being sampled, under WSGI or ASGI.
+        """
+        if (environ := sampling_context.get("wsgi_environ")) is not None:
+            return environ.get("REQUEST_METHOD", ""), environ.get("PATH_INFO", "")
+        if (scope := sampling_context.get("asgi_scope")) is not None and scope.get("type") == "http":
+            return scope.get("method", ""), scope.get("path", "")
+        return None
+
+    def _should_disregard(method: str, path: str) -> bool:
+        matchers = _get_matchers()
+        return method in matchers.disgarded_methods and matchers.disgarded_paths.match(path) is not None
+
+    def _route_rate(path: str, key: str, default: float) -> float:
+        matchers = _get_matchers()
+        if matchers.routes is None or (match := matchers.routes.match(path)) is None:
+            return default
+        return matchers.route_rates[int(match.lastgroup[1:])].get(key, default)
+
+    class _Matchers:
+        """
+        `sentry_disgarded_paths` and the `sentry_route_rates` patterns compiled into a single regex each,
+        patterns use the glob syntax (`/static/*`).
+        """
+
+        def __init__(self) -> None:
+            self.disgarded_methods = frozenset(app_settings.SENTRY_DISGARDED_METHODS)
+            self.disgarded_paths = _compile(app_settings.SENTRY_DISGARDED_PATHS)
+            rates = app_settings.SENTRY_ROUTE_RATES
+            self.route_rates = list(rates.values())
+            # one named group per route, the first matching route wins
+            self.routes = _compile(rates, named=True) if rates else None
+
+    def _compile(patterns, named: bool = False) -> re.Pattern:
+        parts = [fnmatch.translate(pattern) for pattern in patterns]
+        if named:
+            parts = [f"(?P<r{i}>{part})" for i, part in enumerate(parts)]
+        return re.compile("|".join(parts) or "(?!)")
+
+    @functools.cache
+    def _get_matchers() -> _Matchers:
+        return _Matchers()
 
-    def _should_disregard(sampling_context: SamplingContext) -> bool:
-        DISGARDED_METHODS = app_settings.SENTRY_DISGARDED_METHODS  # noqa
-        DISGARDED_PATHS = app_settings.SENTRY_DISGARDED_PATHS  # noqa
+    @functools.cache
+    def _get_throughput_sampler() -> ThroughputSampler | None:
+        if app_settings.SENTRY_TRACES_TARGET is None:
+            return None
+        return ThroughputSampler(app_settings.SENTRY_TRACES_TARGET, app_settings.SENTRY_TRACES_WINDOW)
 
-        return (
-            sampling_context.get("wsgi_environ", None) is not None
-            and sampling_context["wsgi_environ"]["REQUEST_METHOD"] in DISGARDED_METHODS
-            and sampling_context["wsgi_environ"]["PATH_INFO"] in DISGARDED_PATHS
-        )
+    @receiver(setting_changed)
+    def _clear_caches(*, setting: str, **kwargs) -> None:
+        if setting == FALCO_SETTINGS_NAME:
+            _get_matchers.cache_clear()
+            _get_throughput_sampler.cache_clear()
@@ -3,7 +3,18 @@ from typing import TypeVar
 from django import template
 from django.contrib.auth.models import AbstractUser
 from django.contrib.auth.models import AnonymousUser
+from django.core.paginator import Page
 from django.db import models
+from django.template.defaulttags import CsrfTokenNode
+from django.utils.safestring import SafeString
+from falco import tables
+from falco.icons import render_icon
+from falco.tables import column_specs
+from falco.tables import csrf_hx_headers
+from falco.tables import ColumnSpec
+from falco.tables import get_lookup
+from falco.tables import get_model
+from falco.tables import UrlBuilder
 
 register = template.Library()
 
@@ -21,6 +32,76 @@ def field_verbose_names(objects, fields) -> list[str]:
     return [objects[0]._meta.get_field(f).verbose_name for f in fields]  # noqa
 
 
+@register.filter()
+def table_columns(objects, fields) -> tuple[ColumnSpec, ...]:
+    """
+    Column specs (verbose name, kind and accessor) of `fields` for the model of `objects`,
+    resolved once per model instead of once per cell.
+    """
+    if (model := get_model(objects)) is None:
+        return ()
+    return column_specs(model, fields)
+
+
+@register.simple_tag(name="icon")
+def icon_tag(style: str, name: str, size: int | str | None = 24, **attrs) -> SafeString:
+    """
+    Memoized heroicon, `{% icon "outline" "eye" size="18" %}`, see `falco.icons.render_icon`.
+    """
+    return render_icon(style, name, size, **attrs)
+
+
+@register.simple_tag(takes_context=True)
+def csrf_headers(context) -> SafeString:
+    """
+    ` hx-headers` attribute with the csrf token, so forms inside the element don't each need a `{% csrf_token %}`.
+    """
+    csrf_token = context.get("csrf_token")
+    if not csrf_token or csrf_token == "NOTPROVIDED":
+        return ""
+    return csrf_hx_headers(csrf_token)
+
+
+@register.simple_tag(takes_context=True)
+def object_url(context, view_name: str, obj: models.Model) -> str:
+    """
+    Same as `{% url view_name obj|lookup %}`, but the url is only reversed once per view and render,
+    see `UrlBuilder`.
+    """
+    lookup_value = get_lookup(obj)
+    key = ("falco.object_url", view_name)
+    if (build_url := context.render_context.get(key)) is None:
+        build_url = context.render_context[key] = UrlBuilder(view_name, lookup_value)
+    return build_url(lookup_value)
+
+
+@register.simple_tag(takes_context=True)
+def render_table(
+    context,
+    objects,
+    fields,
+    detail_view: str | None = None,
+    update_view: str | None = None,
+    delete_view: str | None = None,
+    hoist_csrf: bool = False,
+) -> SafeString:
+    """
+    Python rendering of `partials/table.html`, for large tables.
+
+        {% render_table objects fields detail_view="books:detail" delete_view="books:delete" %}
+    """
+    csrf_token = context.get("csrf_token") if delete_view and hoist_csrf else None
+    return tables.render_table(
+        objects,
+        fields,
+        detail_view=detail_view,
+        update_view=update_view,
+        delete_view=delete_view,
+        csrf_input=CsrfTokenNode().render(context) if delete_view and not hoist_csrf else "",
+        csrf_token=csrf_token if csrf_token != "NOTPROVIDED" else None,
+    )
+
+
 @register.filter(name="getattr")
 def get_attribute(obj: object, field: str):
     return getattr(obj, field)
@@ -62,3 +143,13 @@ def initials(user: AbstractUser) -> str:
 @register.filter
 def class_name(instance: object) -> str:
     return instance.__class__.__name__
+
+
+@register.filter()
+def page_window(page: Page, on_each_side: int = 2) -> range:
+    """
+    Page numbers shown around the current page, the same window `Paginator.get_elided_page_range`
+    puts between its ellipses, computed without iterating over the whole page range.
+    """
+    on_each_side = int(on_each_side)
+    return range(max(1, page.number - on_each_side), min(page.paginator.num_pages, page.number + on_each_side) + 1)
@@ -1,7 +1,35 @@
+import django
+from django.conf import settings
 from django.urls import path
 from django.views import defaults as default_views
 
-from .views import favicon
+from . import views
+from .conf import app_settings
+
+
+def _use_async_views() -> bool:
+    # the decorators used by the views only support coroutines since django 5.0
+    if django.VERSION < (5, 0):
+        return False
+    if app_settings.ASYNC_VIEWS is not None:
+        return bool(app_settings.ASYNC_VIEWS)
+    # only an ASGI-only project is known to be served under ASGI, the imported modules aren't a signal (daphne is
+    # installed for runserver and channels), and the async views are slower than the sync ones under WSGI
+    return bool(getattr(settings, "ASGI_APPLICATION", None)) and not settings.WSGI_APPLICATION
+
+
+if _use_async_views():
+    favicon = views.afavicon
+    health = views.ahealth
+    readiness = views.areadiness
+    robots_txt = views.arobots_txt
+    security_txt = views.asecurity_txt
+else:
+    favicon = views.favicon
+    health = views.health
+    readiness = views.readiness
+    robots_txt = views.robots_txt
+    security_txt = views.security_txt
 
 favicon_urlpatterns = [
     path("android-chrome-192x192.png", favicon),
@@ -16,6 +44,18 @@ favicon_urlpatterns = [
 ]
 
 
+well_known_urlpatterns = [
+    path("robots.txt", robots_txt),
+    path(".well-known/security.txt", security_txt),
+]
+
+
+health_urlpatterns = [
+    path("health/", health),
+    path("health/ready/", readiness),
+]
+
+
 errors_urlpatterns = [
     path(
         "400/",
@@ -1,22 +1,56 @@
 from __future__ import annotations
 
+import gzip
+import hashlib
+import importlib.util
+import mimetypes
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from dataclasses import field
 from pathlib import Path
 from typing import TYPE_CHECKING
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.contrib.staticfiles import finders
-from django.http import FileResponse
+from django.core.cache import cache
+from django.db import connections
 from django.http import HttpResponse
-from django.shortcuts import render
+from django.http import JsonResponse
+from django.template.loader import render_to_string
 from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.utils.http import quote_etag
 from django.views.decorators.cache import cache_control
+from django.views.decorators.cache import never_cache
 from django.views.decorators.http import require_GET
 from falco.conf import app_settings
+from falco.db_routers import DBTaskRouter
 from falco.decorators import login_not_required
 
 if TYPE_CHECKING:
     from django.http import HttpRequest
 
+# encoders for the compressed variants, from the most to the least preferred
+_ENCODERS: dict[str, Callable[[bytes], bytes]] = {}
+if importlib.util.find_spec("brotli"):
+    import brotli
+
+    _ENCODERS["br"] = brotli.compress
+if importlib.util.find_spec("zstandard"):
+    import zstandard
+
+    # a compressor instance is not thread safe, zstandard.compress creates one per call
+    _ENCODERS["zstd"] = zstandard.compress
+_ENCODERS["gzip"] = lambda content: gzip.compress(content, mtime=0)
+
+_COMPRESSIBLE_TYPES = ("text/", "image/svg+xml", "application/xml", "application/json")
+
 
 @require_GET
 @cache_control(
@@ -26,7 +60,10 @@ if TYPE_CHECKING:
 )
 @login_not_required
 def robots_txt(request: HttpRequest) -> HttpResponse:
-    return render(request, app_settings.TEMPLATE_ROBOTS_TXT, content_type="text/plain")
+    """
+    Render `template_robots_txt` once per process and host (on every request when `DEBUG` is on).
+    """
+    return _asset_response(request, _render_once(request, app_settings.TEMPLATE_ROBOTS_TXT))
 
 
 @require_GET
@@ -37,13 +74,18 @@ def robots_txt(request: HttpRequest) -> HttpResponse:
 )
 @login_not_required
 def security_txt(request: HttpRequest) -> HttpResponse:
-    return render(
+    """
+    Render `template_security_txt` once per process, host and year (on every request when `DEBUG` is on).
+    """
+    return _asset_response(
         request,
-        app_settings.TEMPLATE_SECURITY_TXT,
-        context={
-            "year": timezone.now().year + 1,
-        },
-        content_type="text/plain",
+        _render_once(
+            request,
+            app_settings.TEMPLATE_SECURITY_TXT,
+            context={
+                "year": timezone.now().year + 1,
+            },
+        ),
     )
 
 
@@ -54,15 +96,280 @@ def security_txt(request: HttpRequest) -> HttpResponse:
     public=True,
 )
 @login_not_required
-def favicon(request: HttpRequest) -> HttpResponse | FileResponse:
-    name = request.path.lstrip("/")
-    if path := finders.find(name):
-        return FileResponse(Path(path).read_bytes())
-    return HttpResponse(
-        (
-            '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100">'
-            '<text y=".9em" font-size="90">🚀</text>'
-            "</svg>"
+def favicon(request: HttpRequest) -> HttpResponse:
+    """
+    Serve favicons from the static files, or a rocket emoji svg if there is none.
+
+    Files are looked up and read once per process (on every request when `DEBUG` is on),
+    conditional requests are answered with a 304.
+    """
+    return _asset_response(request, _get_favicon(request.path.lstrip("/")))
+
+
+# Async variants, used by `falco.urls` under ASGI. Once the asset is cached the response is built on the event
+# loop, only a cache miss (template rendering, static files lookup) is handed off to the thread pool.
+
+
+@require_GET
+@cache_control(
+    max_age=0 if settings.DEBUG else app_settings.CACHE_TIME_ROBOTS_TXT,
+    immutable=True,
+    public=True,
+)
+@login_not_required
+async def arobots_txt(request: HttpRequest) -> HttpResponse:
+    """
+    Async version of `robots_txt`.
+    """
+    return _asset_response(request, await _arender_once(request, app_settings.TEMPLATE_ROBOTS_TXT))
+
+
+@require_GET
+@cache_control(
+    max_age=0 if settings.DEBUG else app_settings.CACHE_TIME_SECURITY_TXT,
+    immutable=True,
+    public=True,
+)
+@login_not_required
+async def asecurity_txt(request: HttpRequest) -> HttpResponse:
+    """
+    Async version of `security_txt`.
+    """
+    return _asset_response(
+        request,
+        await _arender_once(
+            request,
+            app_settings.TEMPLATE_SECURITY_TXT,
+            context={
+                "year": timezone.now().year + 1,
+            },
         ),
-        content_type="image/svg+xml",
     )
+
+
+@require_GET
+@cache_control(
+    max_age=0 if settings.DEBUG else app_settings.CACHE_TIME_FAVICON,
+    immutable=True,
+    public=True,
+)
+@login_not_required
+async def afavicon(request: HttpRequest) -> HttpResponse:
+    """
+    Async version of `favicon`.
+    """
+    name = request.path.lstrip("/")
+    asset = _favicons.get(name) or await sync_to_async(_get_favicon)(name)
+    return _asset_response(request, asset)
+
+
+@require_GET
+@never_cache
+@login_not_required
+def health(request: HttpRequest) -> HttpResponse:
+    """
+    Liveness probe, answers as long as the process can serve requests, without touching any service.
+    """
+    return HttpResponse(b'{"status": "ok"}', content_type="application/json")
+
+
+@require_GET
+@never_cache
+@login_not_required
+def readiness(request: HttpRequest) -> JsonResponse:
+    """
+    Readiness probe, checks the default database, the tasks database (when configured) and the default
+    cache concurrently. The result is cached for `cache_time_readiness` seconds so frequent probes
+    don't turn into database load, each check reports its latency.
+    """
+    healthy, body = _get_readiness()
+    return JsonResponse(body, status=200 if healthy else 503)
+
+
+@require_GET
+@never_cache
+@login_not_required
+async def ahealth(request: HttpRequest) -> HttpResponse:
+    """
+    Async version of `health`.
+    """
+    return HttpResponse(b'{"status": "ok"}', content_type="application/json")
+
+
+@require_GET
+@never_cache
+@login_not_required
+async def areadiness(request: HttpRequest) -> JsonResponse:
+    """
+    Async version of `readiness`, a fresh cached result is answered without leaving the event loop.
+    """
+    cached = _readiness
+    if cached is not None and cached[0] >= time.monotonic():
+        healthy, body = cached[1]
+    else:
+        healthy, body = await sync_to_async(_get_readiness)()
+    return JsonResponse(body, status=200 if healthy else 503)
+
+
+_readiness: tuple[float, tuple[bool, dict]] | None = None
+_readiness_lock = threading.Lock()
+
+
+def _get_readiness() -> tuple[bool, dict]:
+    global _readiness  # noqa: PLW0603
+    with _readiness_lock:
+        if _readiness is None or _readiness[0] < time.monotonic():
+            _readiness = (time.monotonic() + app_settings.CACHE_TIME_READINESS, _run_readiness_checks())
+        return _readiness[1]
+
+
+def _run_readiness_checks() -> tuple[bool, dict]:
+    checks = {"database": lambda: _check_database("default")}
+    tasks_db = DBTaskRouter.get_db()
+    if tasks_db != "default" and tasks_db in settings.DATABASES:
+        checks["tasks_database"] = lambda: _check_database(tasks_db)
+    checks["cache"] = _check_cache
+
+    with ThreadPoolExecutor(max_workers=len(checks)) as executor:
+        results = dict(zip(checks, executor.map(_timed, checks.values())))
+    healthy = all(result["status"] == "ok" for result in results.values())
+    return healthy, {"status": "ok" if healthy else "error", "checks": results}
+
+
+def _timed(check: Callable[[], None]) -> dict:
+    start = time.perf_counter()
+    try:
+        check()
+    except Exception as e:  # noqa: BLE001
+        result = {"status": "error", "error": str(e)}
+    else:
+        result = {"status": "ok"}
+    result["latency_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    return result
+
+
+def _check_database(alias: str) -> None:
+    # checks run in short lived threads, close their connections instead of leaking them
+    try:
+        with connections[alias].cursor() as cursor:
+            cursor.execute("SELECT 1")
+    finally:
+        connections[alias].close()
+
+
+def _check_cache() -> None:
+    try:
+        cache.get("falco.readiness")
+    finally:
+        cache.close()
+
+
+@dataclass(frozen=True)
+class _Asset:
+    content: bytes
+    content_type: str
+    etag: str
+    last_modified: int | None = None
+    # encoding -> (compressed content, etag)
+    variants: dict[str, tuple[bytes, str]] = field(default_factory=dict)
+
+    @classmethod
+    def from_content(cls, content: bytes, content_type: str, last_modified: int | None = None) -> _Asset:
+        digest = hashlib.md5(content, usedforsecurity=False).hexdigest()
+        variants = {}
+        if content_type.startswith(_COMPRESSIBLE_TYPES):
+            for encoding, encode in _ENCODERS.items():
+                encoded = encode(content)
+                if len(encoded) < len(content):
+                    variants[encoding] = (encoded, quote_etag(f"{digest}-{encoding}"))
+        return cls(content, content_type, quote_etag(digest), last_modified, variants)
+
+    def negotiate(self, accept_encoding: str) -> tuple[str | None, bytes, str]:
+        if self.variants and accept_encoding:
+            accepted = _parse_accept_encoding(accept_encoding)
+            for encoding, (content, etag) in self.variants.items():
+                if encoding in accepted:
+                    return encoding, content, etag
+        return None, self.content, self.etag
+
+
+def _parse_accept_encoding(header: str) -> set[str]:
+    accepted = set()
+    for item in header.split(","):
+        coding, _, params = item.partition(";")
+        params = params.strip()
+        try:
+            quality = float(params[2:]) if params.startswith("q=") else 1.0
+        except ValueError:
+            quality = 0.0
+        if quality > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+_FALLBACK_FAVICON = _Asset.from_content(
+    (
+        '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100">'
+        '<text y=".9em" font-size="90">🚀</text>'
+        "</svg>"
+    ).encode(),
+    content_type="image/svg+xml",
+)
+
+_favicons: dict[str, _Asset] = {}
+
+
+def _get_favicon(name: str) -> _Asset:
+    if asset := _favicons.get(name):
+        return asset
+
+    asset = _FALLBACK_FAVICON
+    if path := finders.find(name):
+        path = Path(path)
+        content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        asset = _Asset.from_content(path.read_bytes(), content_type, last_modified=int(path.stat().st_mtime))
+    if not settings.DEBUG:
+        _favicons[name] = asset
+    return asset
+
+
+_rendered: dict[tuple, _Asset] = {}
+_RENDERED_MAX_SIZE = 64
+
+
+def _render_key(request: HttpRequest, template_name: str, context: dict | None) -> tuple:
+    # the host is part of the key since templates commonly build absolute urls (e.g. the sitemap url)
+    return (template_name, request.scheme, request.get_host(), *sorted((context or {}).items()))
+
+
+def _render_once(request: HttpRequest, template_name: str, context: dict | None = None) -> _Asset:
+    key = _render_key(request, template_name, context)
+    if asset := _rendered.get(key):
+        return asset
+
+    content = render_to_string(template_name, context, request=request).encode()
+    asset = _Asset.from_content(content, content_type="text/plain")
+    if not settings.DEBUG:
+        if len(_rendered) >= _RENDERED_MAX_SIZE:
+            _rendered.clear()
+        _rendered[key] = asset
+    return asset
+
+
+async def _arender_once(request: HttpRequest, template_name: str, context: dict | None = None) -> _Asset:
+    if asset := _rendered.get(_render_key(request, template_name, context)):
+        return asset
+    return await sync_to_async(_render_once)(request, template_name, context)
+
+
+def _asset_response(request: HttpRequest, asset: _Asset) -> HttpResponse:
+    encoding, content, etag = asset.negotiate(request.headers.get("Accept-Encoding", ""))
+    response = HttpResponse(content, content_type=asset.content_type)
+    response["ETag"] = etag
+    if encoding:
+        response["Content-Encoding"] = encoding
+    if asset.variants:
+        patch_vary_headers(response, ("Accept-Encoding",))
+    if asset.last_modified is not None:
+        response["Last-Modified"] = http_date(asset.last_modified)
+    return get_conditional_response(request, etag=etag, last_modified=asset.last_modified, response=response)
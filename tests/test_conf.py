@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.test import override_settings
+from falco.conf import app_settings
+from falco.pagination import paginate_queryset
+
+
+def test_settings_are_resolved_once():
+    app_settings.reload()
+    assert app_settings.DEFAULT_PAGE_SIZE == 5  # from the demo settings
+    assert vars(app_settings)["DEFAULT_PAGE_SIZE"] == 5
+    assert vars(app_settings)["DEFAULT_COUNT_STRATEGY"] == "exact"
+
+
+def test_settings_follow_setting_changed():
+    with override_settings(FALCO={"default_page_size": 3, "sentry_traces_rate": 0.1}):
+        assert app_settings.DEFAULT_PAGE_SIZE == 3
+        assert app_settings.SENTRY_TRACES_RATE == 0.1
+        assert app_settings.SENTRY_PROFILE_RATE == 0.5
+    assert app_settings.DEFAULT_PAGE_SIZE == 5
+
+
+@pytest.mark.parametrize("falco_settings", [{"default_page_sise": 3}, {"sentry_traces_rate": 2}])
+def test_invalid_settings(falco_settings):
+    with override_settings(FALCO=falco_settings), pytest.raises(ImproperlyConfigured):
+        app_settings.DEFAULT_PAGE_SIZE  # noqa: B018
+
+
+def test_unknown_attribute():
+    with pytest.raises(AttributeError):
+        app_settings.NOPE  # noqa: B018
+
+
+def test_page_size_default_is_resolved_lazily(rf):
+    with override_settings(FALCO={"default_page_size": 2}):
+        page = paginate_queryset(rf.get("/"), list(range(5)))
+    assert page.paginator.per_page == 2
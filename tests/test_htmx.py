@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import pytest
+from asgiref.sync import async_to_sync
+from asgiref.sync import iscoroutinefunction
+from django.core.cache import cache
+from django.template import TemplateDoesNotExist
+from django.template.response import TemplateResponse
+from django.test import override_settings
+from django_htmx.middleware import HtmxDetails
+from falco.checks import check_htmx_partials
+from falco.htmx import for_htmx
+from falco.htmx import htmx_declarations
+from falco.htmx import precompile_partials
+
+TEMPLATE = """
+{% load partials %}
+<main>
+{% partialdef table inline %}<table id="table">{{ rows }}</table>{% endpartialdef %}
+{% partialdef counter inline %}<span id="counter">{{ count }} / {{ calls }}</span>{% endpartialdef %}
+</main>
+"""
+
+processor_calls = []
+
+
+def counting_processor(request):
+    processor_calls.append(request)
+    return {"calls": len(processor_calls)}
+
+
+@pytest.fixture(autouse=True)
+def templates():
+    with override_settings(
+        TEMPLATES=[
+            {
+                "BACKEND": "django.template.backends.django.DjangoTemplates",
+                "OPTIONS": {
+                    "context_processors": ["tests.test_htmx.counting_processor"],
+                    "loaders": [("django.template.loaders.locmem.Loader", {"htmx.html": TEMPLATE})],
+                },
+            }
+        ]
+    ):
+        processor_calls.clear()
+        yield
+
+
+def make_htmx_request(rf, data=None, headers=None):
+    request = rf.get("/", data, headers={"HX-Request": "true", **(headers or {})})
+    request.htmx = HtmxDetails(request)
+    return request
+
+
+@pytest.fixture
+def htmx_request(rf):
+    return make_htmx_request(rf)
+
+
+def view(request):
+    context = {"rows": "rows", "count": int(request.GET.get("count", 3))}
+    return TemplateResponse(request, "htmx.html", context)
+
+
+def test_multiple_partials_share_one_context(htmx_request):
+    response = for_htmx(use_partial=["table", "counter"])(view)(htmx_request)
+
+    assert response.content.decode() == '<table id="table">rows</table><span id="counter">3 / 1</span>'
+    assert len(processor_calls) == 1
+
+
+def test_swap_oob_marks_extra_partials(htmx_request):
+    response = for_htmx(use_partial=["table", "counter"], swap_oob=True)(view)(htmx_request)
+
+    assert response.content.decode() == (
+        '<table id="table">rows</table><span hx-swap-oob="true" id="counter">3 / 1</span>'
+    )
+
+
+def test_unknown_partial(htmx_request):
+    with pytest.raises(TemplateDoesNotExist):
+        for_htmx(use_partial="nope")(view)(htmx_request)
+
+
+def test_cached_partial_skips_rendering(htmx_request):
+    cache.clear()
+    cached_view = for_htmx(use_partial="counter", cache_timeout=60)(view)
+
+    first = cached_view(htmx_request)
+    second = cached_view(htmx_request)
+
+    assert first.content == second.content == b'<span id="counter">3 / 1</span>'
+    assert len(processor_calls) == 1
+    assert first["ETag"] == second["ETag"]
+    assert first["Vary"] == "HX-Request, HX-Target"
+
+
+def test_cached_partial_not_modified(rf):
+    cache.clear()
+    cached_view = for_htmx(use_partial="counter", cache_timeout=60)(view)
+    etag = cached_view(make_htmx_request(rf))["ETag"]
+
+    response = cached_view(make_htmx_request(rf, headers={"If-None-Match": etag}))
+
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+def test_cached_partial_varies_on_context(rf):
+    cache.clear()
+    cached_view = for_htmx(use_partial="counter", cache_timeout=60, cache_vary_on=["count"])(view)
+    cached_view(make_htmx_request(rf))
+
+    response = cached_view(make_htmx_request(rf, {"count": 4}))
+
+    assert response.content == b'<span id="counter">4 / 2</span>'
+
+
+def test_cached_partial_rejects_unstable_vary_on_values(rf):
+    cache.clear()
+
+    def object_view(request):
+        return TemplateResponse(request, "htmx.html", {"rows": object(), "count": 3})
+
+    cached_view = for_htmx(use_partial="counter", cache_timeout=60, cache_vary_on=["rows"])(object_view)
+
+    with pytest.raises(TypeError, match=r"'rows' \(object\)"):
+        cached_view(make_htmx_request(rf))
+
+
+def test_cached_partial_skips_unsafe_methods(rf):
+    cache.clear()
+    cached_view = for_htmx(use_partial="counter", cache_timeout=60)(view)
+
+    def post():
+        request = rf.post("/", headers={"HX-Request": "true"})
+        request.htmx = HtmxDetails(request)
+        return cached_view(request)
+
+    first = post()
+    second = post()
+
+    assert first.content == b'<span id="counter">3 / 1</span>'
+    assert second.content == b'<span id="counter">3 / 2</span>'
+    assert "ETag" not in second
+
+
+def test_cached_partial_per_user_varies_on_cookie(htmx_request):
+    cache.clear()
+    cached_view = for_htmx(use_partial="counter", cache_timeout=60, cache_per_user=True)(view)
+
+    response = cached_view(htmx_request)
+
+    assert response["Vary"] == "HX-Request, HX-Target, Cookie"
+
+
+def test_async_view(htmx_request):
+    async def async_view(request):
+        return view(request)
+
+    decorated = for_htmx(use_partial=["table", "counter"])(async_view)
+
+    assert iscoroutinefunction(decorated)
+    response = async_to_sync(decorated)(htmx_request)
+    assert response.content.decode() == '<table id="table">rows</table><span id="counter">3 / 1</span>'
+
+
+def test_async_view_not_htmx(rf):
+    async def async_view(request):
+        return view(request)
+
+    request = rf.get("/")
+    request.htmx = HtmxDetails(request)
+    response = async_to_sync(for_htmx(use_partial="table")(async_view))(request)
+
+    assert isinstance(response, TemplateResponse)
+
+
+@pytest.fixture
+def declarations():
+    saved = list(htmx_declarations)
+    htmx_declarations.clear()
+    yield htmx_declarations
+    htmx_declarations[:] = saved
+
+
+def test_precompile_partials(declarations):
+    for_htmx(use_partial=["table", "counter"], template_name="htmx.html")(view)
+    for_htmx(use_partial="nope", template_name="htmx.html")(view)
+    for_htmx(use_template="missing.html")(view)
+    for_htmx(use_partial_from_params=True)(view)
+
+    errors = precompile_partials()
+
+    assert len(declarations) == 4
+    assert [(declaration.use_partial, declaration.use_template) for declaration, _ in errors] == [
+        ("nope", None),
+        (None, "missing.html"),
+    ]
+    assert all(isinstance(error, TemplateDoesNotExist) for _, error in errors)
+
+
+def test_htmx_partials_system_check(declarations):
+    for_htmx(use_partial="nope", template_name="htmx.html")(view)
+
+    errors = check_htmx_partials(None)
+
+    assert [error.id for error in errors] == ["falco.E001"]
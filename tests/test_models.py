@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+from datetime import date
+from datetime import timedelta
+
+import pytest
+from demo.books.models import Author
+from demo.books.models import Book
+from django.apps import apps
+from django.db import connection
+from django.db import models
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.test.utils import isolate_apps
+from django.utils import timezone
+from falco import checks
+from falco.models import DBTimeStamped
+from falco.models import IndexedTimeStamped
+from falco.models import TimeStamped
+
+pytestmark = pytest.mark.django_db
+
+LONG_AGO = timezone.now() - timedelta(days=30)
+
+
+@pytest.fixture
+def authors():
+    Author.objects.bulk_create(Author(name=f"Author {i}") for i in range(5))
+    Author.objects.update(updated_at=LONG_AGO)
+    return list(Author.objects.order_by("pk"))
+
+
+def test_update_stamps_updated_at(authors):
+    assert all(author.updated_at == LONG_AGO for author in authors)
+
+    Author.objects.filter(pk=authors[0].pk).update(name="Renamed")
+
+    assert Author.objects.get(pk=authors[0].pk).updated_at > LONG_AGO
+    assert Author.objects.get(pk=authors[1].pk).updated_at == LONG_AGO
+
+
+def test_bulk_update_stamps_updated_at(authors, django_assert_num_queries):
+    for author in authors:
+        author.name += " (updated)"
+
+    with override_settings(FALCO={"bulk_batch_size": 2}), django_assert_num_queries(3):
+        Author.objects.bulk_update(authors, ["name"])
+
+    assert all(author.updated_at > LONG_AGO for author in Author.objects.all())
+
+
+def test_upsert_stamps_updated_at(authors):
+    changed = Author(pk=authors[0].pk, name="Upserted")
+    Author.objects.upsert([changed, Author(name="New")], unique_fields=["id"], update_fields=["name"])
+
+    upserted = Author.objects.get(pk=authors[0].pk)
+    assert upserted.name == "Upserted"
+    assert upserted.updated_at > LONG_AGO
+    assert upserted.created_at == authors[0].created_at
+    assert Author.objects.count() == 6
+
+
+def test_bulk_create_in_batches(django_assert_num_queries):
+    with override_settings(FALCO={"bulk_batch_size": 2}), django_assert_num_queries(3):
+        created = Author.objects.bulk_create(Author(name=f"Author {i}") for i in range(5))
+
+    assert all(author.created_at and author.updated_at for author in created)
+
+
+def test_created_at_index_check(monkeypatch):
+    with isolate_apps("demo.books") as isolated_apps:
+
+        class Unindexed(TimeStamped):
+            class Meta:
+                app_label = "books"
+
+        class Indexed(IndexedTimeStamped):
+            class Meta(IndexedTimeStamped.Meta):
+                app_label = "books"
+
+        class IndexLost(IndexedTimeStamped):
+            class Meta:
+                app_label = "books"
+
+        monkeypatch.setattr(checks, "apps", isolated_apps)
+        warnings = checks.check_timestamped_indexes(None)
+
+    assert [(warning.id, warning.obj) for warning in warnings] == [("falco.W001", Unindexed), ("falco.W001", IndexLost)]
+
+
+def test_created_at_index_check_skips_installed_packages(monkeypatch):
+    with isolate_apps("demo.books") as isolated_apps:
+
+        class Unindexed(TimeStamped):
+            class Meta:
+                app_label = "books"
+
+        monkeypatch.setattr(checks, "apps", isolated_apps)
+        monkeypatch.setattr(isolated_apps.get_app_config("books"), "path", "/venv/lib/python3.12/site-packages/books")
+        assert checks.check_timestamped_indexes(None) == []
+        # explicitly checked apps are always checked
+        assert len(checks.check_timestamped_indexes([isolated_apps.get_app_config("books")])) == 1
+
+
+def test_demo_models_are_indexed():
+    assert checks.check_timestamped_indexes([apps.get_app_config("books")]) == []
+
+
+@pytest.mark.django_db(transaction=True)
+@isolate_apps("demo.books")
+def test_db_timestamped_defaults():
+    class Event(DBTimeStamped):
+        name = models.CharField(max_length=50)
+
+        class Meta:
+            app_label = "books"
+
+    with connection.schema_editor() as editor:
+        editor.create_model(Event)
+    try:
+        event = Event.objects.create(name="Event")
+        assert event.created_at == event.updated_at
+        assert not event.is_edited()
+
+        event.name = "Renamed"
+        event.save(update_fields=["name"])
+        assert event.is_edited()
+        assert Event.objects.get().updated_at == event.updated_at
+    finally:
+        with connection.schema_editor() as editor:
+            editor.delete_model(Event)
+
+
+@pytest.mark.django_db(transaction=True)
+@isolate_apps("demo.books")
+def test_db_timestamped_defaults_without_returning(monkeypatch):
+    class Event(DBTimeStamped):
+        name = models.CharField(max_length=50)
+
+        class Meta:
+            app_label = "books"
+
+    monkeypatch.setattr(connection.features, "can_return_columns_from_insert", False)
+    with connection.schema_editor() as editor:
+        editor.create_model(Event)
+    try:
+        event = Event.objects.create(name="Event")
+        created_at = event.created_at
+        assert created_at == Event.objects.get().created_at
+
+        event.name = "Renamed"
+        event.save()
+        assert Event.objects.get().created_at == created_at
+    finally:
+        with connection.schema_editor() as editor:
+            editor.delete_model(Event)
+
+
+@pytest.fixture
+def tracked(monkeypatch):
+    monkeypatch.setattr(Book, "track_changes", True)
+    author = Author.objects.create(name="Author")
+    Book.objects.create(name="Book", slug="book", description="x" * 1000, published_at=date.today(), author=author)
+    return Book.objects.get()
+
+
+def test_save_only_writes_changed_fields(tracked):
+    tracked.name = "Renamed"
+    with CaptureQueriesContext(connection) as queries:
+        tracked.save()
+
+    (update,) = queries.captured_queries
+    assert '"name"' in update["sql"]
+    assert '"updated_at"' in update["sql"]
+    assert '"description"' not in update["sql"]
+    assert Book.objects.get().name == "Renamed"
+    assert tracked.get_changed_fields() == set()
+
+
+def test_save_without_changes_skips_the_query(tracked, django_assert_num_queries):
+    updated_at = tracked.updated_at
+    tracked.name = tracked.name
+
+    with django_assert_num_queries(0):
+        tracked.save()
+    assert tracked.updated_at == updated_at
+
+
+def test_changed_fields(tracked):
+    tracked.author_id = Author.objects.create(name="Other").pk
+    tracked.cover_art = "covers/new.png"
+
+    assert tracked.get_changed_fields() == {"author", "cover_art"}
+
+
+def test_save_with_update_fields_keeps_the_other_changes(tracked):
+    tracked.name = "Renamed"
+    tracked.description = "Short"
+    tracked.save(update_fields=["description"])
+
+    assert tracked.get_changed_fields() == {"name"}
+    tracked.save()
+    assert Book.objects.values_list("name", "description").get() == ("Renamed", "Short")
+
+
+def test_refresh_from_db_updates_the_loaded_values(tracked):
+    Book.objects.update(name="Other")
+    tracked.refresh_from_db()
+
+    tracked.name = "Book"
+    tracked.save()
+    assert Book.objects.get().name == "Book"
+
+
+def test_explicit_update_fields_and_untracked_models(tracked, django_assert_num_queries, monkeypatch):
+    with django_assert_num_queries(1):
+        tracked.save(update_fields=["description"])
+
+    monkeypatch.setattr(Book, "track_changes", False)
+    book = Book.objects.get()
+    assert "_loaded_values" not in vars(book)
+    with CaptureQueriesContext(connection) as queries:
+        book.save()
+    assert '"description"' in queries.captured_queries[0]["sql"]
@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import re
+from datetime import date
+
+import pytest
+from asgiref.sync import async_to_sync
+from demo.books.models import Author
+from demo.books.models import Book
+from django.core.cache import cache
+from django.core.paginator import EmptyPage
+from django.core.paginator import Paginator
+from django.http import Http404
+from django.template.loader import render_to_string
+from falco.pagination import apaginate_queryset
+from falco.pagination import paginate_queryset
+from falco.pagination import paginate_queryset_by_cursor
+from falco.pagination import project_queryset
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def authors():
+    return [Author.objects.create(name=f"Author {i}") for i in range(7)]
+
+
+def names(page) -> list[str]:
+    return [author.name for author in page]
+
+
+def test_cursor_pagination_walks_forward_and_backward(rf, authors):
+    queryset = Author.objects.all()
+
+    first = paginate_queryset_by_cursor(rf.get("/"), queryset, page_size=3)
+    assert names(first) == ["Author 6", "Author 5", "Author 4"]
+    assert first.has_next()
+    assert not first.has_previous()
+
+    second = paginate_queryset_by_cursor(rf.get("/", {"cursor": first.next_cursor}), queryset, page_size=3)
+    assert names(second) == ["Author 3", "Author 2", "Author 1"]
+    assert second.has_next()
+    assert second.has_previous()
+
+    third = paginate_queryset_by_cursor(rf.get("/", {"cursor": second.next_cursor}), queryset, page_size=3)
+    assert names(third) == ["Author 0"]
+    assert not third.has_next()
+
+    back = paginate_queryset_by_cursor(rf.get("/", {"cursor": third.previous_cursor}), queryset, page_size=3)
+    assert names(back) == names(second)
+
+
+def test_cursor_pagination_is_stable_on_insert(rf, authors):
+    queryset = Author.objects.all()
+    first = paginate_queryset_by_cursor(rf.get("/"), queryset, page_size=3)
+
+    Author.objects.create(name="New author")
+
+    second = paginate_queryset_by_cursor(rf.get("/", {"cursor": first.next_cursor}), queryset, page_size=3)
+    assert names(second) == ["Author 3", "Author 2", "Author 1"]
+
+
+def test_cursor_pagination_last_page(rf, authors):
+    page = paginate_queryset_by_cursor(rf.get("/", {"cursor": "last"}), Author.objects.all(), page_size=3)
+
+    assert names(page) == ["Author 2", "Author 1", "Author 0"]
+    assert not page.has_next()
+    assert page.has_previous()
+
+
+def test_cursor_pagination_invalid_cursor(rf, authors):
+    with pytest.raises(Http404):
+        paginate_queryset_by_cursor(rf.get("/", {"cursor": "not-a-cursor"}), Author.objects.all())
+
+
+@pytest.mark.parametrize("count_strategy", ["exact", "cached", "window", "estimated"])
+def test_count_strategies(rf, authors, count_strategy):
+    page = paginate_queryset(rf.get("/", {"page": "last"}), Author.objects.order_by("pk"), 3, count_strategy)
+
+    assert page.paginator.count == 7
+    assert page.number == 3
+    assert [author.name for author in page.object_list] == ["Author 6"]
+
+
+def test_cached_count_strategy_skips_count_query(rf, authors, django_assert_num_queries):
+    cache.clear()
+    queryset = Author.objects.order_by("pk")
+    paginate_queryset(rf.get("/"), queryset, 3, "cached")
+
+    with django_assert_num_queries(1):
+        page = paginate_queryset(rf.get("/"), queryset, 3, "cached")
+        list(page.object_list)
+
+
+def test_window_count_strategy_single_query(rf, authors, django_assert_num_queries):
+    with django_assert_num_queries(1):
+        page = paginate_queryset(rf.get("/", {"page": 2}), Author.objects.order_by("pk"), 3, "window")
+        assert page.paginator.num_pages == 3
+        assert page.has_next()
+
+
+def test_window_count_strategy_out_of_range(rf, authors):
+    with pytest.raises(Http404):
+        paginate_queryset(rf.get("/", {"page": 4}), Author.objects.order_by("pk"), 3, "window")
+
+
+def test_unknown_count_strategy(rf):
+    with pytest.raises(ValueError):
+        paginate_queryset(rf.get("/"), Author.objects.order_by("pk"), 3, "nope")
+
+
+def test_countless_strategy_skips_count(rf, authors, django_assert_num_queries):
+    with django_assert_num_queries(1):
+        page = paginate_queryset(rf.get("/", {"page": 2}), Author.objects.order_by("pk"), 3, "countless")
+        assert [author.name for author in page] == ["Author 3", "Author 4", "Author 5"]
+        assert page.has_next()
+        assert page.next_page_number() == 3
+        assert page.previous_page_number() == 1
+        assert page.end_index() == 6
+
+    last = paginate_queryset(rf.get("/", {"page": 3}), Author.objects.order_by("pk"), 3, "countless")
+    assert not last.has_next()
+
+    first = paginate_queryset(rf.get("/"), Author.objects.order_by("pk"), 3, "countless")
+    with pytest.raises(EmptyPage):
+        first.previous_page_number()
+
+
+def test_countless_strategy_has_no_last_page(rf, authors, django_assert_num_queries):
+    request = rf.get("/", {"page": "last"})
+    with django_assert_num_queries(0):
+        with pytest.raises(Http404):
+            paginate_queryset(request, Author.objects.order_by("pk"), 3, "countless")
+        with pytest.raises(Http404):
+            async_to_sync(apaginate_queryset)(request, Author.objects.order_by("pk"), 3, "countless")
+
+
+def test_infinite_scroll_partial(rf, authors):
+    page = paginate_queryset(rf.get("/"), Author.objects.order_by("pk"), 3, "countless")
+
+    rendered = render_to_string("partials/infinite_scroll.html", {"page": page, "partial": "rows"})
+
+    assert 'hx-get="?page=2&use_partial=rows"' in rendered
+    assert 'hx-trigger="revealed"' in rendered
+
+
+def test_projection_loads_only_displayed_fields(rf, django_assert_num_queries):
+    author = Author.objects.create(name="Author")
+    for i in range(3):
+        Book.objects.create(name=f"Book {i}", description="x" * 1000, published_at=date.today(), author=author)
+
+    page = paginate_queryset(rf.get("/"), Book.objects.order_by("pk"), 3, fields=("name", "author"))
+
+    with django_assert_num_queries(1):
+        books = list(page.object_list)
+        assert [str(book.author) for book in books] == ["Author"] * 3
+    assert books[0].get_deferred_fields() >= {"description", "cover_art"}
+    assert "slug" not in books[0].get_deferred_fields()
+
+
+def test_projection_skipped_for_non_field_names(rf):
+    queryset = Book.objects.order_by("pk")
+
+    assert project_queryset(queryset, ("name", "__str__")) is queryset
+
+
+@pytest.mark.parametrize("count_strategy", ["exact", "cached", "window", "estimated", "countless"])
+def test_async_pagination(rf, authors, count_strategy):
+    page = async_to_sync(apaginate_queryset)(rf.get("/", {"page": 2}), Author.objects.order_by("pk"), 3, count_strategy)
+
+    assert isinstance(page.object_list, list)
+    assert [author.name for author in page.object_list] == ["Author 3", "Author 4", "Author 5"]
+    assert page.has_next()
+
+
+def test_async_pagination_last_and_invalid_pages(rf, authors):
+    queryset = Author.objects.order_by("pk")
+
+    last = async_to_sync(apaginate_queryset)(rf.get("/", {"page": "last"}), queryset, 3)
+    assert last.number == 3
+
+    for page in ("4", "first"):
+        with pytest.raises(Http404):
+            async_to_sync(apaginate_queryset)(rf.get("/", {"page": page}), queryset, 3)
+
+
+@pytest.mark.parametrize(
+    "number,expected",
+    [
+        (1, [1, 2, 3]),
+        (3, [1, 2, 3, 4, 5]),
+        (25_000, [24_998, 24_999, 25_000, 25_001, 25_002]),
+        (50_000, [49_998, 49_999, 50_000]),
+    ],
+)
+def test_pagination_partial_renders_page_window(number, expected):
+    page = Paginator(range(1_000_000), 20).page(number)
+
+    rendered = render_to_string("partials/pagination.html", {"page": page})
+
+    assert re.findall(r'href="\?page=(\d+)">\d+<', rendered) == [str(n) for n in expected]
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.test import override_settings
+from falco.conf import app_settings
+from falco.sentry import sentry_profiles_sampler
+from falco.sentry import sentry_traces_sampler
+from falco.sentry import ThroughputSampler
+
+
+def wsgi(method: str, path: str) -> dict:
+    return {"wsgi_environ": {"REQUEST_METHOD": method, "PATH_INFO": path}}
+
+
+def asgi(method: str, path: str) -> dict:
+    return {"asgi_scope": {"type": "http", "method": method, "path": path}}
+
+
+@pytest.mark.parametrize("context", [wsgi, asgi])
+def test_disgarded_paths(context):
+    with override_settings(FALCO={"sentry_disgarded_paths": ["/health/", "/static/*"]}):
+        assert sentry_traces_sampler(context("GET", "/health/")) == 0
+        assert sentry_profiles_sampler(context("GET", "/static/css/app.css")) == 0
+        assert sentry_traces_sampler(context("POST", "/health/")) == app_settings.SENTRY_TRACES_RATE
+        assert sentry_traces_sampler(context("GET", "/health/extra")) == app_settings.SENTRY_TRACES_RATE
+
+
+@pytest.mark.parametrize("context", [wsgi, asgi])
+def test_route_rates(context):
+    falco_settings = {
+        "sentry_traces_rate": 0.2,
+        "sentry_route_rates": {
+            "/reports/*": {"traces_rate": 1, "profile_rate": 1},
+            "/api/*": {"traces_rate": 0.01},
+            "/api/slow/": {"traces_rate": 1},
+        },
+    }
+    with override_settings(FALCO=falco_settings):
+        assert sentry_traces_sampler(context("GET", "/reports/yearly/")) == 1
+        assert sentry_profiles_sampler(context("GET", "/reports/yearly/")) == 1
+        assert sentry_traces_sampler(context("GET", "/api/slow/")) == 0.01
+        assert sentry_profiles_sampler(context("GET", "/api/slow/")) == 0.5
+        assert sentry_traces_sampler(context("GET", "/")) == 0.2
+
+
+def test_non_http_transactions_use_the_default_rate():
+    assert sentry_traces_sampler({"asgi_scope": {"type": "websocket", "path": "/ws/"}}) == 0.5
+    assert sentry_traces_sampler({"transaction_context": {"op": "queue.task"}}) == 0.5
+
+
+def test_invalid_route_rates():
+    with override_settings(FALCO={"sentry_route_rates": {"/api/*": {"rate": 1}}}), pytest.raises(ImproperlyConfigured):
+        sentry_traces_sampler(wsgi("GET", "/"))
+    with override_settings(FALCO={"sentry_route_rates": {"/api/*": {"traces_rate": 2}}}):
+        with pytest.raises(ImproperlyConfigured):
+            sentry_traces_sampler(wsgi("GET", "/"))
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_throughput_sampler_holds_the_target():
+    clock = FakeClock()
+    sampler = ThroughputSampler(target=10, window=5, clock=clock)
+
+    for _ in range(5):
+        assert sampler.sample_rate(0.5) == 0.5  # 5 requests/s * 0.5 is under the target
+
+    for _ in range(5):
+        clock.now += 1
+        rates = [sampler.sample_rate(1) for _ in range(100)]
+    assert rates[-1] == pytest.approx(10 / 100)  # 100 requests/s over the last 5 seconds
+
+    # traffic goes back to normal, the spike leaves the window
+    for _ in range(5):
+        clock.now += 1
+        rate = sampler.sample_rate(1)
+    assert rate == 1
+
+
+def test_adaptive_traces_sampler():
+    with override_settings(FALCO={"sentry_traces_rate": 1, "sentry_traces_target": 1}):
+        rates = [sentry_traces_sampler(wsgi("GET", "/")) for _ in range(50)]
+        assert rates[0] == 1
+        assert rates[-1] < 0.1
+        assert sentry_traces_sampler({**wsgi("GET", "/"), "parent_sampled": True}) == 1
+        assert sentry_traces_sampler(wsgi("GET", "/health/")) == 0
+
+
+def test_adaptive_traces_sampler_keeps_sampled_parents():
+    # the fixed rate ignores the upstream decision
+    assert sentry_traces_sampler({**wsgi("GET", "/"), "parent_sampled": True}) == app_settings.SENTRY_TRACES_RATE
+    with override_settings(FALCO={"sentry_traces_target": 1}):
+        assert sentry_traces_sampler({**wsgi("GET", "/"), "parent_sampled": True}) == 1
+        assert sentry_traces_sampler({"parent_sampled": True}) == 1
+        # disregarded requests are dropped even when the upstream service sampled them
+        assert sentry_traces_sampler({**wsgi("GET", "/health/"), "parent_sampled": True}) == 0
+        assert sentry_traces_sampler({**asgi("GET", "/health/"), "parent_sampled": True}) == 0
@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import os
+import re
+import time
+import uuid
+from datetime import date
+
+import pytest
+from demo.books.models import Author
+from demo.books.models import Book
+from django.core.paginator import Paginator
+from django.http import HttpResponse
+from django.template import RequestContext
+from django.template import Template
+from django.template.loader import render_to_string
+from django.urls import include
+from django.urls import path
+from django.urls import re_path
+from django.urls import register_converter
+from django.urls import reverse
+from falco.icons import _render_icon as render_icon
+from falco.tables import BOOLEAN
+from falco.tables import column_specs
+from falco.tables import FILE
+from falco.tables import render_table as render_table_in_python
+from falco.tables import TEXT
+from falco.tables import UrlBuilder
+
+pytestmark = [pytest.mark.django_db, pytest.mark.urls("tests.test_tables")]
+
+FIELDS = ("name", "published_at", "on_going", "cover_art", "author")
+
+
+def view(request, slug=None, pk=None):
+    return HttpResponse(slug)
+
+
+class HexConverter:
+    regex = "[0-9a-f]+"
+
+    def to_python(self, value):
+        return int(value, 16)
+
+    def to_url(self, value):
+        return f"{int(value):x}"
+
+
+class PaddedConverter:
+    regex = "[0-9]{16}"
+
+    def to_python(self, value):
+        return int(value)
+
+    def to_url(self, value):
+        return f"{int(value):016}"
+
+
+register_converter(HexConverter, "test_tables_hex")
+register_converter(PaddedConverter, "test_tables_padded")
+
+
+urlpatterns = [
+    path(
+        "books/",
+        include(
+            (
+                [
+                    path("<str:slug>/", view, name="detail"),
+                    path("<str:slug>/edit/", view, name="update"),
+                    path("<str:slug>/delete/", view, name="delete"),
+                ],
+                "books",
+            )
+        ),
+    ),
+    path("authors/<int:pk>/", view, name="author"),
+    path("files/<path:slug>", view, name="file"),
+    path("uuids/<uuid:slug>/", view, name="uuid"),
+    re_path(r"^short/(?P<pk>[0-9]{1,5})/$", view, name="short"),
+    path("hex/<test_tables_hex:pk>/", view, name="hex"),
+    path("padded/<test_tables_padded:pk>/", view, name="padded"),
+]
+
+
+@pytest.fixture
+def books():
+    author = Author.objects.create(name="Author")
+    return [
+        Book.objects.create(
+            name=f"Book <{i}>",
+            slug=f"book-{i}",
+            description="",
+            published_at=date(2024, 1, i + 1),
+            on_going=bool(i % 2),
+            cover_art="covers/cover.png" if i % 2 else "",
+            author=author,
+        )
+        for i in range(3)
+    ]
+
+
+def render_table(objects, **views) -> str:
+    return render_to_string("partials/table.html", {"objects": objects, "fields": FIELDS, **views})
+
+
+def test_column_specs_are_cached():
+    specs = column_specs(Book, list(FIELDS))
+
+    assert specs is column_specs(Book, FIELDS)
+    assert [spec.kind for spec in specs] == [TEXT, TEXT, BOOLEAN, FILE, TEXT]
+    assert specs[1].verbose_name == "published at"
+    assert column_specs(Book, ["__str__"])[0].kind == TEXT
+
+
+def test_table_renders_columns(books, django_assert_num_queries):
+    queryset = Book.objects.select_related("author").order_by("pk")
+    with django_assert_num_queries(1):
+        html = render_table(queryset, detail_view="books:detail", delete_view="books:delete")
+
+    assert html.count("<th ") == len(FIELDS) + 1
+    assert '<a class="font-bold hover:underline"\n' in html
+    assert 'href="/books/book-0/">Book &lt;0&gt;</a>' in html
+    assert 'covers/cover.png">covers/cover.png</a>' in html
+    assert 'action="/books/book-2/delete/"' in html
+    assert "/edit/" not in html
+
+
+def test_table_without_objects():
+    html = render_table(Book.objects.none())
+
+    assert html.count("<th ") == len(FIELDS) + 1
+    assert render_table([]).count("<th ") == 1
+    assert render_table(Paginator(Book.objects.none(), 5).page(1)).count("<th ") == len(FIELDS) + 1
+
+
+def normalize(html: str) -> str:
+    # the token is masked differently on each render
+    html = re.sub(r'name="csrfmiddlewaretoken" value="\w+"', 'name="csrfmiddlewaretoken"', html)
+    html = re.sub(r"&quot;X-CSRFTOKEN&quot;: &quot;\w+&quot;", "&quot;X-CSRFTOKEN&quot;", html)
+    return re.sub(r"\s*([<>])\s*", r"\1", re.sub(r"\s+", " ", html)).strip()
+
+
+@pytest.mark.parametrize(
+    "views",
+    [
+        {},
+        {"detail_view": "books:detail"},
+        {"detail_view": "books:detail", "update_view": "books:update", "delete_view": "books:delete"},
+        {"delete_view": "books:delete", "hoist_csrf": True},
+    ],
+)
+def test_python_renderer_matches_the_template(rf, books, views):
+    request = rf.get("/")
+    objects = Book.objects.select_related("author").order_by("pk")
+    template_html = render_to_string(
+        "partials/table.html", {"objects": objects, "fields": FIELDS, **views}, request=request
+    )
+    python_html = Template(
+        "{% load falco %}{% render_table objects fields "
+        + " ".join(f'{name}="{value}"' for name, value in views.items())
+        + " %}"
+    ).render(RequestContext(request, {"objects": objects, "fields": FIELDS}))
+
+    assert normalize(python_html) == normalize(template_html)
+    assert ("csrfmiddlewaretoken" in python_html) is ("delete_view" in views and "hoist_csrf" not in views)
+
+
+@pytest.mark.skipif(not os.environ.get("FALCO_BENCHMARK"), reason="timing based, run with `just benchmark`")
+def test_benchmark_python_renderer(rf, books):
+    objects = list(Book.objects.select_related("author").order_by("pk")) * 34
+    views = {"detail_view": "books:detail", "update_view": "books:update", "delete_view": "books:delete"}
+    context = {"objects": objects, "fields": FIELDS, "csrf_token": "token", **views}
+
+    def best_of(render) -> float:
+        timings = []
+        for _ in range(3):
+            start = time.perf_counter()
+            render()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    template_time = best_of(lambda: render_to_string("partials/table.html", context))
+    python_time = best_of(lambda: render_table_in_python(objects, FIELDS, csrf_input="<input>", **views))
+
+    print(f"template: {template_time:.4f}s, python: {python_time:.4f}s")  # noqa: T201
+    assert python_time < template_time
+
+
+@pytest.mark.parametrize(
+    "view_name,values",
+    [
+        ("books:detail", ["book-1", "é à", "50%", "a?b#c"]),
+        ("author", [1, 42]),
+        ("uuid", [uuid.uuid4()]),
+        ("file", ["dir/file.txt", "file.txt"]),
+        ("short", [1, 42]),
+        ("hex", [10, 255]),
+        ("padded", [5, 987654321012]),
+    ],
+)
+def test_url_builder_matches_reverse(view_name, values):
+    build_url = UrlBuilder(view_name, values[0])
+
+    assert [build_url(value) for value in values] == [reverse(view_name, args=[value]) for value in values]
+
+
+def test_url_builder_reverses_once(books, monkeypatch):
+    calls = []
+    monkeypatch.setattr("falco.tables.reverse", lambda *args, **kwargs: calls.append(args) or reverse(*args, **kwargs))
+
+    html = render_table(Book.objects.order_by("pk"), detail_view="books:detail", update_view="books:update")
+
+    assert len(calls) == 2
+    assert 'href="/books/book-2/edit/"' in html
+
+
+def test_hoisted_csrf_shrinks_the_table(rf, books):
+    request = rf.get("/")
+    context = {
+        "objects": list(Book.objects.select_related("author").order_by("pk")) * 34,
+        "fields": FIELDS,
+        "detail_view": "books:detail",
+        "update_view": "books:update",
+        "delete_view": "books:delete",
+    }
+
+    before = render_to_string("partials/table.html", context, request=request)
+    after = render_to_string("partials/table.html", {**context, "hoist_csrf": True}, request=request)
+
+    assert before.count("csrfmiddlewaretoken") == 102
+    assert "csrfmiddlewaretoken" not in after
+    assert after.count("X-CSRFTOKEN") == 1
+    # each row saves the 100 bytes or so of its hidden input
+    assert len(before.encode()) - len(after.encode()) > 100 * 100, (len(before.encode()), len(after.encode()))
+
+
+def test_icons_are_rendered_once(books, monkeypatch):
+    from heroicons.templatetags import heroicons
+
+    render_icon.cache_clear()
+    calls = []
+    original = heroicons.heroicon_outline
+    monkeypatch.setattr(heroicons, "heroicon_outline", lambda *a, **kw: calls.append(a) or original(*a, **kw))
+
+    html = render_to_string("partials/table.html", {"objects": books, "fields": FIELDS, "update_view": "books:update"})
+    render_to_string("partials/table.html", {"objects": books, "fields": FIELDS, "update_view": "books:update"})
+
+    assert calls == [("pencil-square",)]
+    assert html.count("<svg") == len(books) * 2  # update + boolean icons
+
+
+def test_url_builder_only_splits_identity_converters():
+    assert UrlBuilder("author", 1).prefix == "/authors/"
+    assert UrlBuilder("books:detail", "book").suffix == "/"
+    for view_name in ("short", "hex", "padded"):
+        assert UrlBuilder(view_name, 1).prefix is None
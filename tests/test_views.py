@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import json
+from datetime import date
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache.backends.base import BaseCache
+from django.test import override_settings
+from falco import urls
+from falco import views
+from falco.views import favicon
+from falco.views import health
+from falco.views import readiness
+from falco.views import robots_txt
+from falco.views import security_txt
+
+
+class BrokenCache(BaseCache):
+    def __init__(self, *args, **kwargs):
+        super().__init__({})
+
+    def get(self, key, default=None, version=None):
+        msg = "down"
+        raise ConnectionError(msg)
+
+
+TEXT_TEMPLATES = {
+    "robots.txt": "Sitemap: https://{{ request.get_host }}/sitemap.xml",
+    ".well-known/security.txt": "Expires: {{ year }}-01-01T00:00:00.000Z",
+}
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    views._favicons.clear()  # noqa
+    views._rendered.clear()  # noqa
+    yield
+    views._favicons.clear()  # noqa
+    views._rendered.clear()  # noqa
+
+
+@pytest.fixture
+def text_templates():
+    with override_settings(
+        TEMPLATES=[
+            {
+                "BACKEND": "django.template.backends.django.DjangoTemplates",
+                "OPTIONS": {
+                    "context_processors": ["django.template.context_processors.request"],
+                    "loaders": [("django.template.loaders.locmem.Loader", TEXT_TEMPLATES)],
+                },
+            }
+        ],
+        ALLOWED_HOSTS=["*"],
+    ):
+        yield TEXT_TEMPLATES
+
+
+@pytest.fixture
+def static_dir(tmp_path):
+    (tmp_path / "favicon.ico").write_bytes(b"icon")
+    with override_settings(STATICFILES_DIRS=[tmp_path]):
+        yield tmp_path
+
+
+def test_favicon_is_read_once(rf, static_dir):
+    response = favicon(rf.get("/favicon.ico"))
+    (static_dir / "favicon.ico").write_bytes(b"changed")
+
+    assert response.content == b"icon"
+    assert response["Content-Type"].startswith("image/")
+    assert favicon(rf.get("/favicon.ico")).content == b"icon"
+
+
+def test_favicon_conditional_get(rf, static_dir):
+    response = favicon(rf.get("/favicon.ico"))
+
+    by_etag = favicon(rf.get("/favicon.ico", headers={"If-None-Match": response["ETag"]}))
+    by_date = favicon(rf.get("/favicon.ico", headers={"If-Modified-Since": response["Last-Modified"]}))
+
+    assert by_etag.status_code == by_date.status_code == 304
+    assert by_etag["ETag"] == response["ETag"]
+
+
+def test_favicon_fallback(rf):
+    response = favicon(rf.get("/favicon-32x32.png"))
+
+    assert response["Content-Type"] == "image/svg+xml"
+    assert b"<svg" in response.content
+    assert favicon(rf.get("/favicon-32x32.png", headers={"If-None-Match": response["ETag"]})).status_code == 304
+
+
+def test_robots_txt_is_rendered_once_per_host(rf, text_templates):
+    response = robots_txt(rf.get("/robots.txt"))
+    text_templates["robots.txt"] = "changed"
+
+    assert response.content == b"Sitemap: https://testserver/sitemap.xml"
+    assert response["Content-Type"] == "text/plain"
+    assert robots_txt(rf.get("/robots.txt")).content == response.content
+    assert robots_txt(rf.get("/robots.txt", HTTP_HOST="example.com")).content == b"changed"
+
+
+def test_security_txt_conditional_get(rf, text_templates):
+    response = security_txt(rf.get("/.well-known/security.txt"))
+
+    assert f"Expires: {date.today().year + 1}-01-01".encode() in response.content
+    not_modified = security_txt(rf.get("/.well-known/security.txt", headers={"If-None-Match": response["ETag"]}))
+    assert not_modified.status_code == 304
+
+
+@pytest.mark.parametrize("encoding,module_name", [("gzip", "gzip"), ("br", "brotli"), ("zstd", "zstandard")])
+def test_favicon_compressed_variants(rf, static_dir, encoding, module_name):
+    module = pytest.importorskip(module_name)
+    decompress = module.ZstdDecompressor().decompress if encoding == "zstd" else module.decompress
+    xml = b"<browserconfig><msapplication>" + b"<tile/>" * 100 + b"</msapplication></browserconfig>"
+    (static_dir / "browserconfig.xml").write_bytes(xml)
+
+    response = favicon(rf.get("/browserconfig.xml", headers={"Accept-Encoding": f"{encoding}, identity;q=0.5"}))
+
+    assert response["Content-Encoding"] == encoding
+    assert response["Vary"] == "Accept-Encoding"
+    assert decompress(response.content) == xml
+    identity = favicon(rf.get("/browserconfig.xml", headers={"Accept-Encoding": f"{encoding};q=0"}))
+    assert identity.content == xml
+    assert not identity.has_header("Content-Encoding")
+    assert identity["ETag"] != response["ETag"]
+
+
+@pytest.fixture
+def no_readiness_cache():
+    views._readiness = None  # noqa
+    yield
+    views._readiness = None  # noqa
+
+
+def test_health(rf):
+    response = health(rf.get("/health/"))
+
+    assert json.loads(response.content) == {"status": "ok"}
+    assert "no-cache" in response["Cache-Control"]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_readiness(rf, no_readiness_cache):
+    response = readiness(rf.get("/health/ready/"))
+
+    body = json.loads(response.content)
+    assert response.status_code == 200
+    assert body["status"] == "ok"
+    assert set(body["checks"]) == {"database", "cache"}
+    assert all(check["latency_ms"] >= 0 for check in body["checks"].values())
+    assert json.loads(readiness(rf.get("/health/ready/")).content) == body
+
+
+def test_readiness_failure(rf, no_readiness_cache):
+    with override_settings(CACHES={"default": {"BACKEND": "tests.test_views.BrokenCache"}}):
+        response = readiness(rf.get("/health/ready/"))
+
+    body = json.loads(response.content)
+    assert response.status_code == 503
+    assert body["status"] == "error"
+    assert body["checks"]["cache"]["status"] == "error"
+    assert body["checks"]["cache"]["error"] == "down"
+
+
+def test_async_views_serve_cached_assets_on_the_event_loop(rf, static_dir, text_templates, monkeypatch):
+    icon = async_to_sync(views.afavicon)(rf.get("/favicon.ico"))
+    robots = async_to_sync(views.arobots_txt)(rf.get("/robots.txt"))
+
+    def no_thread_hop(func):
+        raise AssertionError(func)
+
+    monkeypatch.setattr(views, "sync_to_async", no_thread_hop)
+    assert async_to_sync(views.afavicon)(rf.get("/favicon.ico")).content == icon.content == b"icon"
+    assert async_to_sync(views.arobots_txt)(rf.get("/robots.txt")).content == robots.content
+    assert robots["Cache-Control"] == robots_txt(rf.get("/robots.txt"))["Cache-Control"]
+    not_modified = async_to_sync(views.afavicon)(rf.get("/favicon.ico", headers={"If-None-Match": icon["ETag"]}))
+    assert not_modified.status_code == 304
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_health_and_readiness(rf, no_readiness_cache):
+    assert json.loads(async_to_sync(views.ahealth)(rf.get("/health/")).content) == {"status": "ok"}
+
+    response = async_to_sync(views.areadiness)(rf.get("/health/ready/"))
+    assert response.status_code == 200
+    assert json.loads(response.content) == json.loads(readiness(rf.get("/health/ready/")).content)
+
+
+@pytest.mark.parametrize(
+    "falco_settings,django_settings,expected",
+    [
+        ({}, {}, False),
+        ({}, {"ASGI_APPLICATION": "demo.asgi.application"}, False),
+        ({}, {"ASGI_APPLICATION": "demo.asgi.application", "WSGI_APPLICATION": None}, True),
+        ({"async_views": False}, {"ASGI_APPLICATION": "demo.asgi.application", "WSGI_APPLICATION": None}, False),
+        ({"async_views": True}, {}, True),
+    ],
+)
+def test_urls_use_async_views_under_asgi(falco_settings, django_settings, expected):
+    with override_settings(FALCO=falco_settings, **django_settings):
+        assert urls._use_async_views() is expected  # noqa